@@ -0,0 +1,96 @@
+"""
+Benchmark and parity check: bulk vs scalar valuation
+Scores a synthetic fleet with BulkValuationEngine and ValuationEngine,
+fails if any vehicle's result differs, and reports vehicles/s for each
+
+Run from the backend directory:
+    python benchmarks/bench_bulk_valuation.py [fleet_size]
+"""
+
+from typing import Any, Dict
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bulk_valuation import BulkValuationEngine  # noqa: E402
+from corpus import generate_corpus  # noqa: E402
+from valuation_engine import ValuationEngine  # noqa: E402
+
+
+def compact(valuation: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a full ValuationEngine report to the fields the bulk engine returns"""
+    if valuation["recommendation"] == "insufficient_data":
+        return {"recommendation": valuation["recommendation"], "score": 0}
+
+    financial = valuation["financial_analysis"]
+    summary = valuation["mot_summary"]
+    return {
+        "overall_score": valuation["overall_score"],
+        "recommendation": valuation["recommendation"],
+        "scores": valuation["scores"],
+        "asking_price": financial["asking_price"],
+        "estimated_repairs": financial["estimated_repairs"],
+        "estimated_repairs_min": financial["estimated_repairs_min"],
+        "estimated_repairs_max": financial["estimated_repairs_max"],
+        "total_estimated_cost": financial["total_estimated_cost"],
+        "total_tests": summary["total_tests"],
+        "recent_failures": summary["recent_failures"],
+        "dangerous_defects_found": summary["dangerous_defects_found"]
+    }
+
+
+def main():
+    fleet_size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    corpus = generate_corpus(fleet_size)
+    # Edge cases: no tests, null tests, string odometer readings, unparseable dates
+    corpus.append(({"motTests": []}, 1000.0))
+    corpus.append(({"motTests": None}, 1000.0))
+    corpus.append(({"motTests": [
+        {"completedDate": "2024.01.01", "testResult": "PASSED", "odometerValue": "90000", "defects": []},
+        {"completedDate": "2023.01.01", "testResult": "PASSED", "odometerValue": "80000", "defects": []}
+    ]}, 1000.0))
+    corpus.append(({"motTests": [
+        {"completedDate": "2024-01-01T10:00:00.000Z", "testResult": "FAILED", "odometerValue": 90000, "defects": None},
+    ]}, 1000.0))
+    corpus.append(({"motTests": [
+        {"completedDate": "2024-01-01T10:00:00.000Z", "testResult": "PASSED", "odometerValue": 90000, "defects": []},
+        {"completedDate": "2023-01-01T10:00:00.000Z", "testResult": "PASSED", "odometerValue": 80000, "defects": []}
+    ]}, 1000.0))
+
+    histories = [history for history, _ in corpus]
+    asking_prices = [price for _, price in corpus]
+
+    scalar = ValuationEngine()
+    started = time.perf_counter()
+    expected = []
+    for history, price in corpus:
+        try:
+            expected.append(compact(scalar.calculate_valuation(history, price)))
+        except Exception as e:
+            expected.append({"error": f"{type(e).__name__}: {e}"})
+    scalar_time = time.perf_counter() - started
+
+    bulk = BulkValuationEngine()
+    started = time.perf_counter()
+    result = bulk.calculate_valuations(histories, asking_prices)
+    bulk_time = time.perf_counter() - started
+
+    actual = result.to_records()
+    mismatches = [index for index, (a, b) in enumerate(zip(expected, actual)) if a != b]
+    if mismatches:
+        index = mismatches[0]
+        raise SystemExit(
+            f"{len(mismatches)} mismatches; first at vehicle {index}:\n"
+            f"  scalar: {expected[index]}\n  bulk:   {actual[index]}"
+        )
+
+    print(f"fleet: {len(corpus)} vehicles, parity OK")
+    print(f"scalar engine: {len(corpus) / scalar_time:>12,.0f} vehicles/s")
+    print(f"bulk engine:   {len(corpus) / bulk_time:>12,.0f} vehicles/s")
+    print(f"speedup:       {scalar_time / bulk_time:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
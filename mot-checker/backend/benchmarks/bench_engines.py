@@ -0,0 +1,211 @@
+"""
+Benchmark suite: valuation and repair-cost engines, with regression check
+Times ValuationEngine.calculate_valuation, estimate_repair_cost (memoized,
+and the category matchers alone), calculate_total_repair_costs and
+get_repair_history_summary on a seeded synthetic corpus (1-30 tests per
+vehicle, weighted defect texts), reporting calls/s and memory allocated per
+call. Results are compared with
+the stored baselines; a drop in calls/s or a rise in allocation beyond the
+threshold is a regression and makes the run exit non-zero.
+
+Baselines depend on the machine: save them on the machine you compare on.
+
+Run from the backend directory:
+    python benchmarks/bench_engines.py                 # compare with baselines.json
+    python benchmarks/bench_engines.py --save          # record new baselines
+    python benchmarks/bench_engines.py --only valuation --threshold 0.1
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_corpus  # noqa: E402
+from repair_costs import (  # noqa: E402
+    _classify_normalized,
+    calculate_total_repair_costs,
+    estimate_repair_cost,
+    get_repair_history_summary
+)
+from valuation_engine import ValuationEngine  # noqa: E402
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Allocation differences below this many bytes per call are noise, not regressions
+ALLOCATION_SLACK = 64
+
+
+class Case(NamedTuple):
+    """One benchmark: call(item) for every item in items"""
+    name: str
+    call: Callable[[Any], Any]
+    items: Sequence[Any]
+
+
+def build_cases(corpus_size: int, seed: int) -> List[Case]:
+    corpus = generate_corpus(corpus_size, seed=seed)
+    engine = ValuationEngine()
+    tests = [history["motTests"] for history, _ in corpus]
+    defect_lists = [test.get("defects", []) for history in tests for test in history[:3]]
+    defect_texts = [defect["text"] for defects in defect_lists for defect in defects]
+    # get_repair_history_summary reads the older rfrAndComments field
+    rfr_histories = [[{**test, "rfrAndComments": test["defects"]} for test in history] for history in tests]
+
+    return [
+        Case("valuation", lambda item: engine.calculate_valuation(*item), corpus),
+        Case("estimate_repair_cost", estimate_repair_cost, defect_texts),
+        # The matchers behind the memo cache, as met by each new defect text
+        Case("classify_uncached", lambda text: _classify_normalized(text.lower().strip()), defect_texts),
+        Case("total_repair_costs", calculate_total_repair_costs, defect_lists),
+        Case("repair_history_summary", get_repair_history_summary, rfr_histories)
+    ]
+
+
+def time_case(case: Case, min_time: float) -> float:
+    """Calls/s over passes through the items lasting at least min_time seconds"""
+    call, items = case.call, case.items
+    calls = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        started = time.perf_counter()
+        for item in items:
+            call(item)
+        elapsed += time.perf_counter() - started
+        calls += len(items)
+    return calls / elapsed
+
+
+def time_cases(cases: List[Case], repeat: int, min_time: float) -> Dict[str, float]:
+    """Best calls/s per case; cases take turns so drift in machine speed hits them alike"""
+    best = {case.name: 0.0 for case in cases}
+    for _ in range(repeat):
+        for case in cases:
+            best[case.name] = max(best[case.name], time_case(case, min_time))
+    return best
+
+
+def allocation_per_call(case: Case) -> float:
+    """Mean bytes allocated (peak above the starting point) by one call"""
+    total = 0
+    tracemalloc.start()
+    try:
+        for item in case.items:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = case.call(item)
+            total += tracemalloc.get_traced_memory()[1] - before
+            del result
+    finally:
+        tracemalloc.stop()
+    return total / len(case.items)
+
+
+def machine() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine()
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float
+) -> List[str]:
+    """Print results against the baseline and return the names of regressed cases"""
+    regressions = []
+    print(f"{'case':<28} {'calls/s':>12} {'vs base':>9} {'bytes/call':>11} {'vs base':>9}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<28} {result['ops_per_sec']:>12,.0f} {'new':>9} {result['bytes_per_call']:>11,.0f} {'new':>9}")
+            continue
+
+        speed = result["ops_per_sec"] / base["ops_per_sec"] - 1
+        allocation = (result["bytes_per_call"] - base["bytes_per_call"]) / max(base["bytes_per_call"], 1)
+        slower = speed < -threshold
+        heavier = (
+            allocation > threshold
+            and result["bytes_per_call"] - base["bytes_per_call"] > ALLOCATION_SLACK
+        )
+        if slower or heavier:
+            regressions.append(name)
+        print(
+            f"{name:<28} {result['ops_per_sec']:>12,.0f} {speed:>+8.1%}{'!' if slower else ' '}"
+            f"{result['bytes_per_call']:>11,.0f} {allocation:>+8.1%}{'!' if heavier else ' '}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the valuation and repair-cost engines")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINES, help="baseline file to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown/extra allocation (0.15 = 15%%)")
+    parser.add_argument("--only", action="append", help="run only the named case (repeatable)")
+    parser.add_argument("--corpus", type=int, default=500, help="vehicles in the corpus")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed pass")
+    args = parser.parse_args(argv)
+
+    cases = build_cases(args.corpus, args.seed)
+    case_names = {case.name for case in cases}
+    if args.only:
+        unknown = set(args.only) - case_names
+        if unknown:
+            parser.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+        cases = [case for case in cases if case.name in args.only]
+
+    for case in cases:
+        case.call(case.items[0])  # Warm up lazy imports and caches
+    speeds = time_cases(cases, args.repeat, args.min_time)
+    results = {
+        case.name: {
+            "ops_per_sec": round(speeds[case.name], 1),
+            "bytes_per_call": round(allocation_per_call(case), 1)
+        }
+        for case in cases
+    }
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    corpus = {"size": args.corpus, "seed": args.seed}
+    if baseline and baseline.get("corpus") != corpus:
+        print(f"Baseline was recorded with corpus {baseline.get('corpus')}, not {corpus}; not comparing")
+        baseline = {}
+    elif baseline and baseline.get("machine") != machine():
+        print(f"Warning: baseline was recorded on {baseline['machine']}")
+
+    print(f"corpus: {args.corpus} vehicles, seed {args.seed}; threshold {args.threshold:.0%}\n")
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+
+    if args.save:
+        # Keep saved results for cases not run this time (--only), but drop cases that no longer exist
+        kept = {name: result for name, result in baseline.get("results", {}).items() if name in case_names}
+        merged = {**kept, **results}
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine(), "corpus": corpus, "results": merged}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaselines saved to {args.baseline}")
+    elif regressions:
+        print(f"\nRegressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    elif not baseline:
+        print("\nNo baseline to compare with; run with --save to record one")
+
+
+if __name__ == "__main__":
+    main()
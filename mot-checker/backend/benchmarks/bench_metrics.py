@@ -0,0 +1,122 @@
+"""
+Benchmark: cost of the /metrics instrumentation
+Times the primitives (counter increment, histogram observation), the
+per-request cost of MetricsMiddleware around a bare ASGI app, and
+ValuationEngine.calculate_valuation with no observations, with the default
+single observation per call, and with METRICS_STAGE_TIMINGS.
+
+Run from the backend directory:
+    python benchmarks/bench_metrics.py [vehicles]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import generate_history  # noqa: E402
+from metrics import Counter, Histogram, MetricsMiddleware, Registry  # noqa: E402
+import metrics  # noqa: E402
+import repair_costs  # noqa: E402
+import valuation_engine  # noqa: E402
+
+
+def per_call_ns(stmt, number: int = 200000, **namespace) -> float:
+    return min(timeit.repeat(stmt, globals=namespace, number=number, repeat=5)) / number * 1e9
+
+
+def bench_primitives() -> None:
+    counter = Counter("c", "", ["endpoint", "status"])
+    histogram = Histogram("h", "", ["method", "route", "status"])
+    timings = {
+        "perf_counter() x2": per_call_ns("p(); p()", p=time.perf_counter),
+        "Counter.inc (2 labels)": per_call_ns("inc('vin', '200')", inc=counter.inc),
+        "Histogram.observe (3 labels)": per_call_ns(
+            "observe(0.003, 'POST', '/api/mot/lookup', '200')",
+            observe=histogram.observe
+        ),
+        "HistogramSeries.observe": per_call_ns("observe(0.003)", observe=histogram.labels("x").observe)
+    }
+    print("primitives")
+    for label, ns in timings.items():
+        print(f"  {label:<30} {ns:6.0f} ns")
+
+
+async def bench_middleware(requests: int = 50000) -> None:
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "POST", "path": "/api/mot/lookup"}
+    wrapped = MetricsMiddleware(app, Registry().histogram("h", "", ["method", "route", "status"]))
+
+    async def run(target) -> float:
+        started = time.perf_counter()
+        for _ in range(requests):
+            await target(dict(scope), receive, send)
+        return (time.perf_counter() - started) / requests * 1e9
+
+    # Alternate the two so drift in machine speed affects both alike
+    bare = instrumented = float("inf")
+    for _ in range(5):
+        bare = min(bare, await run(app))
+        instrumented = min(instrumented, await run(wrapped))
+    print("\nMetricsMiddleware (bare ASGI app)")
+    print(f"  without {bare:8.0f} ns/request")
+    print(f"  with    {instrumented:8.0f} ns/request  (+{instrumented - bare:.0f} ns)")
+
+
+def bench_valuation(vehicles: int) -> None:
+    rng = random.Random(7)
+    corpus = [generate_history(rng, test_count=rng.randint(1, 20)) for _ in range(vehicles)]
+    engine = valuation_engine.ValuationEngine()
+
+    def value_all():
+        for history in corpus:
+            engine.calculate_valuation(history, 5000)
+
+    value_all()
+    modules = (valuation_engine, repair_costs)
+
+    def timed(stage_timings: bool) -> float:
+        for module in modules:
+            module.STAGE_TIMINGS = stage_timings
+        return timeit.timeit(value_all, number=1) / vehicles
+
+    # Alternate the modes so drift in machine speed affects all alike
+    disabled = single = stages = float("inf")
+    for _ in range(5):
+        # Shadow observe() with a no-op (the two clock reads remain)
+        valuation_engine.VALUATION_SECONDS.observe = lambda value: None
+        disabled = min(disabled, timed(False))
+        del valuation_engine.VALUATION_SECONDS.observe
+        single = min(single, timed(False))
+        stages = min(stages, timed(True))
+    for module in modules:
+        module.STAGE_TIMINGS = metrics.STAGE_TIMINGS
+
+    print(f"\ncalculate_valuation ({vehicles} vehicles, 1-20 tests)")
+    print(f"  observation disabled  {disabled * 1e6:8.2f} us/vehicle")
+    print(f"  one per call          {single * 1e6:8.2f} us/vehicle  (+{(single - disabled) * 1e6:.2f} us)")
+    print(f"  stage timings         {stages * 1e6:8.2f} us/vehicle  (+{(stages - disabled) * 1e6:.2f} us)")
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bench_primitives()
+    asyncio.run(bench_middleware())
+    bench_valuation(vehicles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: repair-cost category matching
+Compares the precompiled matchers in repair_costs.py (with and without
+memoization) against the original per-pattern re.search loop on a corpus
+of real-world MOT defect texts
+
+Run from the backend directory:
+    python benchmarks/bench_repair_matcher.py
+"""
+
+from typing import List
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corpus import DEFECT_TEXTS  # noqa: E402
+from repair_costs import (  # noqa: E402
+    REPAIR_COSTS,
+    _classify_normalized,
+    classification_cache_info,
+    estimate_repair_cost
+)
+
+def legacy_category(failure_text: str) -> str:
+    """Category lookup as implemented before the matchers were precompiled"""
+    failure_lower = failure_text.lower()
+    for category, data in REPAIR_COSTS.items():
+        for pattern in data["patterns"]:
+            if re.search(pattern, failure_lower):
+                return category
+    return "unknown"
+
+
+def build_corpus(size: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(DEFECT_TEXTS) for _ in range(size)]
+
+
+def main():
+    corpus = build_corpus(20000)
+
+    # Both implementations must classify every text identically
+    mismatches = [
+        text for text in DEFECT_TEXTS
+        if estimate_repair_cost(text)["category"] != legacy_category(text)
+    ]
+    if mismatches:
+        raise SystemExit(f"Category mismatch for: {mismatches}")
+
+    def run_legacy():
+        for text in corpus:
+            legacy_category(text)
+
+    def run_compiled():
+        for text in corpus:
+            _classify_normalized(text.lower().strip())
+
+    def run_memoized():
+        for text in corpus:
+            estimate_repair_cost(text)
+
+    legacy_time = min(timeit.repeat(run_legacy, number=1, repeat=5))
+    compiled_time = min(timeit.repeat(run_compiled, number=1, repeat=5))
+    memoized_time = min(timeit.repeat(run_memoized, number=1, repeat=5))
+
+    print(f"corpus: {len(corpus)} defect texts ({len(DEFECT_TEXTS)} distinct)")
+    print(f"legacy loop:      {len(corpus) / legacy_time:>12,.0f} texts/s")
+    print(f"precompiled:      {len(corpus) / compiled_time:>12,.0f} texts/s"
+          f"  ({legacy_time / compiled_time:.2f}x)")
+    print(f"memoized:         {len(corpus) / memoized_time:>12,.0f} texts/s"
+          f"  ({legacy_time / memoized_time:.2f}x)")
+    print(f"classification cache: {classification_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: response serialization for long MOT histories
+Compares, for lookup and valuation responses on 20-year histories:
+FastAPI's default path (jsonable_encoder + JSONResponse), orjson on the
+same dict, and passing the upstream body through as raw bytes
+
+Run from the backend directory:
+    python benchmarks/bench_serialization.py [vehicles]
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import orjson  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from corpus import generate_history  # noqa: E402
+from main import json_response_with_raw, valuation_engine  # noqa: E402
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(42)
+    histories = [generate_history(rng, test_count=20) for _ in range(vehicles)]
+    bodies = [json.dumps(history).encode() for history in histories]
+
+    meta = {
+        "registration": "AB12CDE",
+        "vin": None,
+        "lookup_token": "0" * 32,
+        "processed_at": "2025-12-16T12:00:00",
+        "last_updated": "2025-12-16"
+    }
+    cases = {
+        "lookup": [({**meta, "data": history}, {**meta}, body) for history, body in zip(histories, bodies)],
+        "valuation": [
+            (
+                {**meta, "valuation": valuation, "data": history},
+                {**meta, "valuation": valuation},
+                body
+            )
+            for history, body in zip(histories, bodies)
+            for valuation in [valuation_engine.calculate_valuation(history, 5000)]
+        ]
+    }
+
+    print(f"{vehicles} vehicles x 20 tests, average upstream body {sum(map(len, bodies)) / vehicles / 1024:.1f} KiB")
+    for name, payloads in cases.items():
+        # All three paths must produce the same document
+        for full, without_data, body in payloads[:5]:
+            expected = json.loads(JSONResponse(jsonable_encoder(full)).body)
+            assert json.loads(orjson.dumps(full)) == expected
+            assert json.loads(json_response_with_raw(without_data, {"data": body}).body) == expected
+
+        def default():
+            for full, _, _ in payloads:
+                JSONResponse(jsonable_encoder(full))
+
+        def with_orjson():
+            for full, _, _ in payloads:
+                orjson.dumps(full)
+
+        def passthrough():
+            for _, without_data, body in payloads:
+                json_response_with_raw(without_data, {"data": body})
+
+        timings = {
+            label: min(timeit.repeat(fn, number=1, repeat=5)) / len(payloads)
+            for label, fn in (("default", default), ("orjson", with_orjson), ("passthrough", passthrough))
+        }
+        print(f"\n{name} response")
+        for label, seconds in timings.items():
+            print(f"  {label:<12} {seconds * 1e6:>9.1f} us/response  "
+                  f"({timings['default'] / seconds:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: startup time and first-request latency
+Starts fresh interpreters that import main and send /api/mot/valuation
+requests (history pre-cached, so no network), reporting import time, the
+first request's latency and warm latency. Also times the per-request
+import + ValuationEngine() construction the endpoints used to do.
+
+Run from the backend directory:
+    python benchmarks/bench_startup.py [runs]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import timeit
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+# Runs in a fresh interpreter for each measurement
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+sys.path.insert(0, "benchmarks")
+from corpus import generate_history
+import random
+from fastapi.testclient import TestClient
+
+main.RATE_LIMIT_REQUESTS = 10 ** 9
+history = generate_history(random.Random(1), test_count=15, registration="AB12CDE")
+main.mot_cache.set("AB12CDE", main.make_mot_history("AB12CDE", json.dumps(history).encode(), history))
+client = TestClient(main.app, base_url="http://localhost")
+body = {"registration": "AB12CDE", "asking_price": 4000}
+
+timings = []
+for _ in range(51):
+    t = time.perf_counter()
+    response = client.post("/api/mot/valuation", json=body)
+    timings.append(time.perf_counter() - t)
+    assert response.status_code == 200, response.text
+
+timings_warm = sorted(timings[1:])
+print(json.dumps({
+    "import": imported - started,
+    "first": timings[0],
+    "warm": timings_warm[len(timings_warm) // 2]
+}))
+"""
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=BACKEND,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median_ms(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    # What every valuation request used to pay before the engine was shared
+    legacy = min(timeit.repeat(
+        "from valuation_engine import ValuationEngine; ValuationEngine()",
+        number=10000,
+        repeat=5
+    )) / 10000
+
+    print(f"{runs} fresh processes (medians)")
+    print(f"import main:              {median_ms('import'):8.1f} ms")
+    print(f"first valuation request:  {median_ms('first'):8.2f} ms")
+    print(f"warm valuation request:   {median_ms('warm'):8.2f} ms")
+    print(f"old per-request import + engine construction: {legacy * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
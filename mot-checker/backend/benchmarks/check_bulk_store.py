@@ -0,0 +1,117 @@
+"""
+Correctness check: local MOT bulk store
+Ingests small bulk and delta loads into a temporary store and checks the
+lookups by registration and VIN, including a plate transfer (a delta that
+moves a VIN to a new registration). Then ingests the checked-in fixtures
+(fixtures/: a gzipped JSON-lines bulk file, the same vehicles as a tar of
+gzipped parts, and a delta) and serves them through main.get_mot_history
+and get_mot_history_by_vin. Exits non-zero on the first failure.
+
+Run from the backend directory:
+    python benchmarks/check_bulk_store.py
+"""
+
+from typing import Any, Optional
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bulk_store import MOTBulkStore  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def record(registration: str, vin: Optional[str], make: str = "FORD"):
+    data = {"registration": registration, "make": make, "motTests": []}
+    if vin:
+        data["vin"] = vin
+    return registration, vin, json.dumps(data)
+
+
+def expect(label: str, actual: Any, expected: Any) -> None:
+    if actual != expected:
+        raise SystemExit(f"FAIL {label}: expected {expected!r}, got {actual!r}")
+    print(f"ok   {label}")
+
+
+def check_plate_transfer(store: MOTBulkStore) -> None:
+    store.ingest([record("AB05CDE", "VIN0001"), record("CD06EFG", "VIN0002")], "full-1")
+    expect("VIN found by its plate", store.get_record_by_vin("VIN0001").registration, "AB05CDE")
+
+    # The vehicle is re-registered: the delta carries its new plate only
+    store.ingest([record("ZZ99ZZZ", "VIN0001")], "delta-1", delta=True)
+    expect("transferred VIN follows the new plate", store.get_record_by_vin("VIN0001").registration, "ZZ99ZZZ")
+    expect("old plate no longer carries the VIN", store.get_record_by_registration("AB05CDE").vin, None)
+    expect("old plate's history is kept", store.has_registration("AB05CDE"), True)
+    expect("raw lookup by VIN agrees", json.loads(store.get_raw_by_vin("VIN0001"))["registration"], "ZZ99ZZZ")
+    expect("other vehicles untouched", store.get_record_by_vin("VIN0002").registration, "CD06EFG")
+
+    # Within one load, the later record carrying a VIN keeps it
+    store.ingest([record("EF07GHI", "VIN0003"), record("GH08IJK", "VIN0003")], "delta-2", delta=True)
+    expect("later record in a delta keeps the VIN", store.get_record_by_vin("VIN0003").registration, "GH08IJK")
+    expect("earlier record in a delta drops it", store.get_record_by_registration("EF07GHI").vin, None)
+    store.ingest([record("JK09LMN", "VIN0004"), record("LM10NOP", "VIN0004")], "full-2")
+    expect("later record in a full file keeps the VIN", store.get_record_by_vin("VIN0004").registration, "LM10NOP")
+    expect("earlier record in a full file drops it", store.get_record_by_registration("JK09LMN").vin, None)
+
+
+def check_fixtures(directory: str) -> None:
+    plain = MOTBulkStore(os.path.join(directory, "plain.db"))
+    tarred = MOTBulkStore(os.path.join(directory, "tarred.db"))
+    try:
+        expect("bulk .json.gz ingested", plain.ingest_file(os.path.join(FIXTURES, "bulk-sample.json.gz")), 4)
+        expect("bulk .tar ingested", tarred.ingest_file(os.path.join(FIXTURES, "bulk-sample.tar")), 4)
+        rows = "SELECT registration, vin, data FROM vehicles ORDER BY registration"
+        expect("tar and .json.gz give the same store", tarred.conn.execute(rows).fetchall(), plain.conn.execute(rows).fetchall())
+        expect("record without a VIN", tarred.get_record_by_registration("GH08IJK").vin, None)
+        expect("delta ingested", tarred.ingest_file(os.path.join(FIXTURES, "delta-sample.json.gz"), delta=True), 2)
+        expect("re-ingesting a file is skipped", tarred.ingest_file(os.path.join(FIXTURES, "delta-sample.json.gz"), delta=True), 0)
+        expect("delta moved the VIN", tarred.get_record_by_vin("FIXTUREVIN000001").registration, "ZZ99ZZZ")
+    finally:
+        plain.close()
+        tarred.close()
+
+    asyncio.run(check_served(os.path.join(directory, "tarred.db")))
+
+
+async def check_served(path: str) -> None:
+    """Serve the fixture store through the API's lookup functions (no DVSA calls: every plate is stored)"""
+    os.environ.setdefault("DVLA_CLIENT_ID", "check")
+    os.environ.setdefault("DVLA_CLIENT_SECRET", "check")
+    import main
+
+    main.bulk_store = MOTBulkStore(path, read_only=True)
+    try:
+        history = await main.get_mot_history("CD06EFG")
+        expect("get_mot_history from the store", history.data["registration"], "CD06EFG")
+        expect("dated by ingestion, not fresh", history.fetched_at < main.datetime.utcnow(), True)
+        expect("VIN indexed from the store record", main.vehicle_index.vin_for("CD06EFG"), "FIXTUREVIN000002")
+
+        history = await main.get_mot_history_by_vin("FIXTUREVIN000001")
+        expect("get_mot_history_by_vin follows the transfer", history.registration, "ZZ99ZZZ")
+        history = await main.get_mot_history("AB05CDE")
+        expect("old plate still served", history.registration, "AB05CDE")
+        expect("old plate not linked to the VIN", main.vehicle_index.vin_for("AB05CDE"), None)
+        expect("no DVSA requests made", main.dvsa_upstream.requests, 0)
+    finally:
+        main.bulk_store.close()
+        main.bulk_store = None
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store = MOTBulkStore(os.path.join(directory, "mot.db"))
+        try:
+            check_plate_transfer(store)
+        finally:
+            store.close()
+        check_fixtures(directory)
+    print("bulk store checks passed")
+
+
+if __name__ == "__main__":
+    main()
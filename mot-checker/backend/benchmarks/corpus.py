@@ -0,0 +1,141 @@
+"""
+Synthetic MOT history corpus for benchmarks
+Generates DVSA-shaped vehicle histories with realistic defect texts
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import random
+
+# Defect texts as they appear in DVSA MOT histories
+DEFECT_TEXTS = [
+    "Nearside Front Tyre worn close to legal limit/worn on edge (5.2.3 (e))",
+    "Offside Front Tyre tread depth below requirements of 1.6mm (5.2.3 (e))",
+    "Nearside Rear Tyre slightly damaged/cracking or perishing (5.2.3 (d) (ii))",
+    "Offside Rear Brake pipe corroded, covered in grease or other material (1.1.11 (c))",
+    "Front Brake disc worn, pitted or scored, but not seriously weakened (1.1.14 (a) (ii))",
+    "Nearside Front Brake pad(s) less than 1.5 mm thick (1.1.13 (a) (ii))",
+    "Parking brake efficiency below requirements (1.4.2 (a))",
+    "Service brake efficiency only just met. It would appear that the braking system requires adjustment or repair.",
+    "Nearside Front Suspension arm pin or bush worn (5.3.4 (a) (i))",
+    "Offside Front Shock absorber has a light misting of oil (5.3.2 (b))",
+    "Nearside Rear Coil spring corroded",
+    "Nearside Front Anti-roll bar linkage ball joint has slight play (5.3.4 (a) (i))",
+    "Oil leak, but not excessive (8.4.1 (a))",
+    "Power steering fluid leak",
+    "Exhaust has a minor leak of exhaust gases (6.1.2 (a))",
+    "Exhaust system insecure (6.1.2 (a))",
+    "Windscreen damaged but not adversely affecting driver's view (3.2 (a) (i))",
+    "Wiper blade defective (3.4 (b) (i))",
+    "Windscreen washer provides insufficient washer liquid (3.5 (a))",
+    "Offside Headlamp aim too high (4.1.2 (a))",
+    "Nearside Rear Position lamp not working (4.2.1 (a) (ii))",
+    "Offside Front Direction indicator inoperative (4.4.1 (a))",
+    "Registration plate deteriorated (0.1 (b))",
+    "Underside has slight corrosion",
+    "Nearside Sill corroded to the extent that it is inadequate (6.1.1 (c))",
+    "Emissions excessive",
+    "Lambda reading after 2nd fast idle outside limits",
+    "Seat belt pretensioner inoperative",
+    "Horn inoperative (4.5.1 (a))",
+    "Driver's door does not close securely",
+    "Offside mirror damaged (3.3 (a))",
+    "Steering rack gaiter split",
+    "Offside Track rod end ball joint has slight play (2.1.3 (b) (i))",
+    "Engine MIL inoperative (8.2.1.2 (a))",
+    "Electronic Stability Control MIL indicates a malfunction (5.8 (b))",
+    "Rear Registration plate lamp inoperative in the case of multiple lamps/light sources (4.7.1 (b) (i))",
+]
+
+# Relative frequency of each text above; lamps, tyres, suspension and brakes
+# dominate real MOT results, one-off faults are rare
+DEFECT_TEXT_WEIGHTS = [
+    6, 5, 4, 3, 4, 4, 2, 1, 4, 3, 4, 4, 4, 1, 2, 1, 3, 3,
+    2, 4, 4, 3, 2, 4, 2, 2, 1, 1, 1, 1, 1, 2, 2, 1, 1, 3
+]
+
+# Relative frequency of defect types across real histories
+DEFECT_TYPES = ["ADVISORY"] * 6 + ["MINOR"] * 2 + ["MAJOR"] * 2 + ["FAIL", "DANGEROUS", "PRS", "USER ENTERED"]
+
+
+def generate_defect_text(rng: random.Random) -> str:
+    """Pick a defect text by real-world frequency, on either side of the vehicle"""
+    text = rng.choices(DEFECT_TEXTS, weights=DEFECT_TEXT_WEIGHTS)[0]
+    if text.startswith(("Nearside ", "Offside ")) and rng.random() < 0.5:
+        text = ("Offside " if text.startswith("Nearside ") else "Nearside ") + text.split(" ", 1)[1]
+    return text
+
+
+def generate_history(
+    rng: random.Random,
+    test_count: Optional[int] = None,
+    registration: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate one vehicle's MOT history, newest test first
+
+    Args:
+        rng: Random source (seed it for repeatable corpora)
+        test_count: Number of tests; 1-30 if not given
+        registration: Registration to use; random if not given
+    """
+    if test_count is None:
+        test_count = rng.randint(1, 30)
+    if registration is None:
+        registration = f"{rng.choice('ABCDEFGHJKLMNOPRSTVWXY')}{rng.choice('ABCDEFGHJKLMNOPRSTVWXY')}" \
+                       f"{rng.randint(10, 99)}{''.join(rng.choice('ABCDEFGHJKLMNOPRSTVWXYZ') for _ in range(3))}"
+
+    year = 2025
+    odometer = rng.randint(test_count * 4000, test_count * 14000 + 5000)
+    tests = []
+    for index in range(test_count):
+        failed = rng.random() < 0.25
+        defects = [
+            {
+                "text": generate_defect_text(rng),
+                "type": rng.choice(DEFECT_TYPES),
+                "dangerous": rng.random() < 0.03
+            }
+            for _ in range(min(int(rng.expovariate(0.5)), 12))
+        ]
+        test = {
+            "completedDate": f"{year - index}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}",
+            "testResult": "FAILED" if failed else "PASSED",
+            "expiryDate": None if failed else f"{year - index + 1}-06-01",
+            "odometerValue": odometer,
+            "odometerUnit": "MI",
+            "odometerResultType": "READ",
+            "motTestNumber": str(rng.randint(10 ** 11, 10 ** 12 - 1)),
+            "dataSource": "DVSA",
+            "defects": defects
+        }
+        # Occasional clocking or missing readings
+        if rng.random() < 0.03:
+            test["odometerValue"] = odometer + rng.randint(1000, 20000)
+        elif rng.random() < 0.03:
+            test["odometerValue"] = None
+            test["odometerResultType"] = "UNREADABLE"
+        tests.append(test)
+        odometer = max(odometer - rng.randint(2000, 15000), 0)
+
+    return {
+        "registration": registration,
+        "make": rng.choice(["Ford", "Vauxhall", "Volkswagen", "BMW", "Toyota", "Nissan"]),
+        "model": rng.choice(["Focus", "Astra", "Golf", "3 Series", "Yaris", "Qashqai"]),
+        "fuelType": rng.choice(["Petrol", "Diesel", "Hybrid Electric (Clean)"]),
+        "primaryColour": rng.choice(["Silver", "Black", "Blue", "Red", "White"]),
+        "hasOutstandingRecall": "No",
+        "motTests": tests
+    }
+
+
+def generate_corpus(
+    size: int,
+    seed: int = 42,
+    test_count: Optional[int] = None
+) -> List[Tuple[Dict[str, Any], float]]:
+    """Generate (history, asking_price) pairs"""
+    rng = random.Random(seed)
+    return [
+        (generate_history(rng, test_count), float(rng.choice([750, 1500, 3000, 6000, 12000])))
+        for _ in range(size)
+    ]
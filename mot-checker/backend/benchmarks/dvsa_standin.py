@@ -0,0 +1,259 @@
+"""
+Local stand-in for the DVSA MOT history API and its OAuth2 token endpoint
+Serves the registration and VIN endpoints from mot_history_open_api_specification.yml
+with synthetic histories (0-30 tests, the same history every time for a given
+plate), so the backend can be load-tested without using real DVSA quota.
+Latency, error rates, throttling and an overall request quota are configurable.
+
+Usage (from the backend directory):
+    python benchmarks/dvsa_standin.py [--port 9000] [--latency 80] [--error-rate 0.01] ...
+
+Then point the backend at it:
+    DVLA_TOKEN_URL=http://127.0.0.1:9000/token
+    DVLA_API_URL=http://127.0.0.1:9000/v1/trade/vehicles/registration
+    DVLA_VIN_API_URL=http://127.0.0.1:9000/v1/trade/vehicles/vin
+"""
+
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Optional
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import orjson  # noqa: E402
+from fastapi import FastAPI, Form, Request, Response  # noqa: E402
+
+from corpus import generate_history  # noqa: E402
+
+REGISTRATION_PATTERN = re.compile(r"^[A-Z0-9]{2,8}$")
+VIN_PATTERN = re.compile(r"^[A-Z0-9]{5,20}$")
+
+
+class StandinConfig:
+    """Behaviour of the stand-in; latencies in seconds, rates as fractions of requests"""
+
+    def __init__(
+        self,
+        latency: float = 0.08,
+        jitter: float = 0.3,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        not_found_rate: float = 0.05,
+        quota_rps: float = 0.0,
+        token_latency: float = 0.15,
+        token_ttl: int = 3600,
+        max_tests: int = 30,
+        include_vin: bool = False,
+        seed: int = 0
+    ):
+        self.latency = latency  # Median response time
+        self.jitter = jitter  # Log-normal sigma around the median
+        self.error_rate = error_rate  # 500s
+        self.throttle_rate = throttle_rate  # Random 429s
+        self.not_found_rate = not_found_rate  # Plates that are always 404
+        self.quota_rps = quota_rps  # Requests per second before 429s (0: unlimited), as DVSA enforces
+        self.token_latency = token_latency
+        self.token_ttl = token_ttl
+        self.max_tests = max_tests
+        # Add a "vin" field to responses; not in the DVSA spec, so off unless testing that path
+        self.include_vin = include_vin
+        self.seed = seed
+
+
+def _fraction(value: str, seed: int) -> float:
+    """Stable value in [0, 1) for a string, so per-plate outcomes never change"""
+    digest = hashlib.sha256(f"{seed}:{value}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def vin_for(registration: str, seed: int = 0) -> str:
+    """17-character VIN for a synthetic vehicle"""
+    return ("SIM" + hashlib.sha256(f"{seed}:vin:{registration}".encode()).hexdigest()[:14]).upper()
+
+
+def create_app(config: StandinConfig) -> FastAPI:
+    app = FastAPI(title="DVSA MOT history API stand-in", docs_url=None, redoc_url=None)
+    issued_tokens: Dict[str, float] = {}
+    vin_registrations: Dict[str, str] = {}
+    registration_vins: Dict[str, str] = {}
+    counts: Counter = Counter()
+    quota = {"tokens": config.quota_rps, "updated": time.monotonic()}
+    rng = random.Random(config.seed)
+
+    @lru_cache(maxsize=20000)
+    def vehicle_body(registration: str, vin: str) -> bytes:
+        vehicle_rng = random.Random(f"{config.seed}:{registration}")
+        test_count = vehicle_rng.randint(0, config.max_tests)
+        if test_count == 0:
+            # NewRegVehicleResponse: registered too recently to need an MOT
+            history = generate_history(vehicle_rng, test_count=1, registration=registration)
+            del history["motTests"]
+            history["motTestDueDate"] = "2027-03-01"
+        else:
+            history = generate_history(vehicle_rng, test_count=test_count, registration=registration)
+        if config.include_vin:
+            history["vin"] = vin
+        return orjson.dumps(history)
+
+    def error(status_code: int, code: str, message: str, headers: Optional[Dict[str, str]] = None) -> Response:
+        return Response(
+            orjson.dumps({"errorCode": code, "errorMessage": message, "requestId": secrets.token_hex(8)}),
+            status_code=status_code,
+            media_type="application/json",
+            headers=headers
+        )
+
+    def over_quota() -> bool:
+        if not config.quota_rps:
+            return False
+        now = time.monotonic()
+        quota["tokens"] = min(config.quota_rps, quota["tokens"] + (now - quota["updated"]) * config.quota_rps)
+        quota["updated"] = now
+        if quota["tokens"] < 1:
+            return True
+        quota["tokens"] -= 1
+        return False
+
+    async def respond_latency(median: float) -> None:
+        if median > 0:
+            await asyncio.sleep(median * rng.lognormvariate(0, config.jitter) if config.jitter else median)
+
+    def check_request(request: Request) -> Optional[Response]:
+        """Authentication, quota and injected failures shared by the vehicle endpoints"""
+        authorization = request.headers.get("authorization", "")
+        token = authorization[7:] if authorization.startswith("Bearer ") else ""
+        if issued_tokens.get(token, 0) < time.time():
+            return error(401, "MOTH-UA-01", "Missing or expired access token")
+        if not request.headers.get("x-api-key"):
+            return error(403, "MOTH-FB-02", "Missing API key")
+        if over_quota() or (config.throttle_rate and rng.random() < config.throttle_rate):
+            return error(429, "MOTH-RL-01", "Too many requests", headers={"Retry-After": "1"})
+        if config.error_rate and rng.random() < config.error_rate:
+            return error(500, "MOTH-IS-01", "Internal server error")
+        return None
+
+    def vehicle_response(request: Request, endpoint: str, registration: str) -> Response:
+        response = check_request(request)
+        if response is None:
+            if _fraction(registration, config.seed) < config.not_found_rate:
+                response = error(404, "MOTH-NF-01", "No data found")
+            else:
+                vin = registration_vins.get(registration)
+                if vin is None:
+                    vin = registration_vins[registration] = vin_for(registration, config.seed)
+                    vin_registrations[vin] = registration
+                response = Response(vehicle_body(registration, vin), media_type="application/json")
+        counts[(endpoint, response.status_code)] += 1
+        return response
+
+    @app.post("/token")
+    @app.post("/{tenant}/oauth2/v2.0/token")
+    async def token(
+        grant_type: str = Form(...),
+        client_id: str = Form(""),
+        client_secret: str = Form(""),
+        scope: str = Form("")
+    ):
+        await respond_latency(config.token_latency)
+        if grant_type != "client_credentials" or not client_id or not client_secret:
+            counts[("token", 400)] += 1
+            return Response(
+                orjson.dumps({"error": "invalid_request"}),
+                status_code=400,
+                media_type="application/json"
+            )
+        access_token = secrets.token_urlsafe(32)
+        issued_tokens[access_token] = time.time() + config.token_ttl
+        counts[("token", 200)] += 1
+        return Response(
+            orjson.dumps({"token_type": "Bearer", "expires_in": config.token_ttl, "access_token": access_token}),
+            media_type="application/json"
+        )
+
+    @app.get("/v1/trade/vehicles/registration/{registration}")
+    async def vehicle_by_registration(registration: str, request: Request):
+        await respond_latency(config.latency)
+        registration = registration.replace(" ", "").upper()
+        if not REGISTRATION_PATTERN.match(registration):
+            counts[("registration", 400)] += 1
+            return error(400, "MOTH-BR-01", "Invalid registration")
+        return vehicle_response(request, "registration", registration)
+
+    @app.get("/v1/trade/vehicles/vin/{vin}")
+    async def vehicle_by_vin(vin: str, request: Request):
+        await respond_latency(config.latency)
+        vin = vin.upper()
+        if not VIN_PATTERN.match(vin):
+            counts[("vin", 400)] += 1
+            return error(400, "MOTH-BR-02", "Invalid VIN")
+        registration = vin_registrations.get(vin)
+        if registration is None:
+            # A VIN not handed out by a registration lookup: give it a plate of its own
+            registration = "V" + hashlib.sha256(f"{config.seed}:{vin}".encode()).hexdigest()[:6].upper()
+            registration_vins[registration] = vin
+            vin_registrations[vin] = registration
+        return vehicle_response(request, "vin", registration)
+
+    @app.get("/_standin/stats")
+    async def stats():
+        return {
+            "requests": [
+                {"endpoint": endpoint, "status": status, "count": count}
+                for (endpoint, status), count in sorted(counts.items())
+            ],
+            "tokens_issued": len(issued_tokens),
+            "cached_vehicles": vehicle_body.cache_info().currsize
+        }
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local DVSA MOT history API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=80, help="median response time, ms")
+    parser.add_argument("--jitter", type=float, default=0.3, help="log-normal sigma of response times")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--not-found-rate", type=float, default=0.05, help="fraction of plates that are 404")
+    parser.add_argument("--quota-rps", type=float, default=0.0, help="requests/s before 429s (0: unlimited)")
+    parser.add_argument("--token-latency", type=float, default=150, help="token endpoint response time, ms")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="access token lifetime, seconds")
+    parser.add_argument("--max-tests", type=int, default=30, help="most MOT tests per vehicle")
+    parser.add_argument(
+        "--include-vin",
+        action="store_true",
+        help="add a vin field to vehicle responses (not in the DVSA spec; the real API omits it)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    config = StandinConfig(
+        latency=args.latency / 1000,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        not_found_rate=args.not_found_rate,
+        quota_rps=args.quota_rps,
+        token_latency=args.token_latency / 1000,
+        token_ttl=args.token_ttl,
+        max_tests=args.max_tests,
+        include_vin=args.include_vin,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+End-to-end load test for /api/mot/lookup and /api/mot/valuation
+Virtual users send lookups and valuations for plates drawn from a fixed pool
+(its size sets the cache hit rate) and the run reports throughput and
+p50/p95/p99 latency per endpoint.
+
+With --start, the DVSA stand-in (dvsa_standin.py) and the backend (gunicorn)
+are launched locally and wired together, so nothing touches the real API:
+    python benchmarks/load_test.py --start --duration 30 --concurrency 50
+
+Against a backend that is already running (pointed at the stand-in):
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --api-key KEY
+
+Run from the backend directory.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import math
+import os
+import random
+import secrets
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def plate_pool(size: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [f"LT{rng.randint(0, 999999):06d}" for _ in range(size)]
+
+
+async def run_load(
+    url: str,
+    api_key: str,
+    concurrency: int,
+    duration: float,
+    total_requests: int,
+    plates: List[str],
+    valuation_ratio: float,
+    seed: int
+) -> Tuple[Dict[str, List[float]], Counter, float]:
+    """Drive the backend; returns latencies per endpoint, (endpoint, status) counts and elapsed time"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    issued = 0
+    rng = random.Random(seed)
+
+    async with httpx.AsyncClient(
+        base_url=url,
+        headers={"X-API-Key": api_key},
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=30.0
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration if duration else math.inf
+
+        async def virtual_user():
+            nonlocal issued
+            while time.perf_counter() < deadline and (not total_requests or issued < total_requests):
+                issued += 1
+                registration = rng.choice(plates)
+                if rng.random() < valuation_ratio:
+                    endpoint = "valuation"
+                    path, body = "/api/mot/valuation", {
+                        "registration": registration,
+                        "asking_price": rng.choice([750, 1500, 3000, 6000, 12000])
+                    }
+                else:
+                    endpoint = "lookup"
+                    path, body = "/api/mot/lookup", {"registration": registration}
+
+                request_started = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    await response.aread()
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies[endpoint].append(time.perf_counter() - request_started)
+                statuses[(endpoint, status)] += 1
+
+        await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def report(latencies: Dict[str, List[float]], statuses: Counter, elapsed: float) -> None:
+    everything = [latency for values in latencies.values() for latency in values]
+    rows = [(endpoint, values) for endpoint, values in sorted(latencies.items())] + [("all", everything)]
+
+    print(f"\n{len(everything)} requests in {elapsed:.1f} s")
+    print(f"{'endpoint':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, values in rows:
+        if not values:
+            continue
+        ordered = sorted(values)
+        print(
+            f"{endpoint:<10} {len(ordered):>9} {len(ordered) / elapsed:>9.1f} "
+            f"{percentile(ordered, 0.50) * 1000:>9.1f} {percentile(ordered, 0.95) * 1000:>9.1f} "
+            f"{percentile(ordered, 0.99) * 1000:>9.1f} {ordered[-1] * 1000:>9.1f}"
+        )
+
+    print("\nstatus codes")
+    for (endpoint, status), count in sorted(statuses.items()):
+        print(f"  {endpoint:<10} {status:<20} {count}")
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f} s")
+
+
+def start_servers(args: argparse.Namespace, api_key: str) -> List[subprocess.Popen]:
+    """Launch the DVSA stand-in and a gunicorn backend wired to it"""
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    standin = subprocess.Popen(
+        [
+            sys.executable, os.path.join("benchmarks", "dvsa_standin.py"),
+            "--port", str(args.standin_port),
+            "--latency", str(args.upstream_latency),
+            "--error-rate", str(args.upstream_error_rate),
+            "--throttle-rate", str(args.upstream_throttle_rate),
+            "--quota-rps", str(args.upstream_quota_rps)
+        ],
+        cwd=BACKEND
+    )
+    processes = [standin]
+    try:
+        wait_until_up(f"{standin_url}/_standin/stats", standin)
+        env = {
+            **os.environ,
+            "DVLA_CLIENT_ID": "load-test",
+            "DVLA_CLIENT_SECRET": "load-test",
+            "DVLA_API_KEY": "load-test",
+            "DVLA_TOKEN_URL": f"{standin_url}/token",
+            "DVLA_API_URL": f"{standin_url}/v1/trade/vehicles/registration",
+            "DVLA_VIN_API_URL": f"{standin_url}/v1/trade/vehicles/vin",
+            "API_SECRET_KEY": api_key,
+            "RATE_LIMIT_REQUESTS": str(10 ** 9),
+            "SERVER_HOST": "127.0.0.1",
+            "SERVER_PORT": str(args.port),
+            "SERVER_WORKERS": str(args.workers)
+        }
+        backend = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", "main:app",
+                "-c", "gunicorn.conf.py",
+                "--access-logfile", os.devnull
+            ],
+            cwd=BACKEND,
+            env=env
+        )
+        processes.append(backend)
+        wait_until_up(f"http://127.0.0.1:{args.port}/health", backend)
+    except BaseException:
+        stop_servers(processes)
+        raise
+    return processes
+
+
+def stop_servers(processes: List[subprocess.Popen]) -> None:
+    for process in reversed(processes):
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_upstream_stats(standin_url: str) -> None:
+    try:
+        stats = httpx.get(f"{standin_url}/_standin/stats", timeout=2.0).json()
+    except (httpx.HTTPError, ValueError):
+        return
+    print("\nupstream (stand-in) requests")
+    for row in stats["requests"]:
+        print(f"  {row['endpoint']:<14} {row['status']:<5} {row['count']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test the MOT checker backend")
+    parser.add_argument("--url", default=None, help="backend to test (default: the one --start launches)")
+    parser.add_argument("--api-key", default=os.getenv("API_SECRET_KEY", ""))
+    parser.add_argument("--concurrency", type=int, default=50, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds (0: until --requests are sent)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0: no limit)")
+    parser.add_argument("--plates", type=int, default=2000, help="distinct registrations requested")
+    parser.add_argument("--valuation-ratio", type=float, default=0.5, help="fraction of requests that are valuations")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds of traffic before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+
+    start = parser.add_argument_group("with --start")
+    start.add_argument("--start", action="store_true", help="launch the DVSA stand-in and backend locally")
+    start.add_argument("--port", type=int, default=8100)
+    start.add_argument("--workers", type=int, default=1)
+    start.add_argument("--standin-port", type=int, default=9100)
+    start.add_argument("--standin-url", default=None, help="stand-in to report upstream counts from")
+    start.add_argument("--upstream-latency", type=float, default=80, help="stand-in median latency, ms")
+    start.add_argument("--upstream-error-rate", type=float, default=0.0)
+    start.add_argument("--upstream-throttle-rate", type=float, default=0.0)
+    start.add_argument("--upstream-quota-rps", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    processes: List[subprocess.Popen] = []
+    if args.start:
+        args.api_key = args.api_key or secrets.token_hex(16)
+        processes = start_servers(args, args.api_key)
+        args.url = args.url or f"http://127.0.0.1:{args.port}"
+        args.standin_url = args.standin_url or f"http://127.0.0.1:{args.standin_port}"
+    elif not args.url:
+        parser.error("--url is required without --start")
+
+    plates = plate_pool(args.plates, args.seed)
+    try:
+        if args.warmup:
+            asyncio.run(run_load(
+                args.url, args.api_key, args.concurrency, args.warmup, 0,
+                plates, args.valuation_ratio, args.seed + 1
+            ))
+        print(
+            f"{args.concurrency} virtual users, {args.plates} plates, "
+            f"{args.valuation_ratio:.0%} valuations against {args.url}"
+        )
+        latencies, statuses, elapsed = asyncio.run(run_load(
+            args.url, args.api_key, args.concurrency, args.duration, args.requests,
+            plates, args.valuation_ratio, args.seed
+        ))
+        report(latencies, statuses, elapsed)
+        if args.standin_url:
+            print_upstream_stats(args.standin_url)
+    finally:
+        stop_servers(processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Streaming reader for DVSA bulk-download files
+Walks bulk and delta files record by record in constant memory,
+decompressing on the fly. The service publishes a .gz containing further
+.gz files (optionally inside a tar); plain, gzipped and tarred JSON-lines
+files are accepted nested to any depth, and a zip at the top level.
+
+Usage:
+    python bulk_reader.py bulk-file.json.gz [--mmap] [--raw] [--value]
+"""
+
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Optional
+import argparse
+import gzip
+import io
+import json
+import mmap
+import os
+import re
+import sys
+import tarfile
+import time
+import zipfile
+
+READ_BUFFER_SIZE = 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+TAR_MAGIC_OFFSET = 257
+TAR_MAGIC = b"ustar"
+
+# Top-level keys, found without parsing the whole record (see parse=False)
+REGISTRATION_FIELD = re.compile(rb'"registration"\s*:\s*"([^"]*)"')
+VIN_FIELD = re.compile(rb'"vin"\s*:\s*"([^"]*)"')
+
+
+class BulkRecord(NamedTuple):
+    """One vehicle from a bulk file"""
+    registration: Optional[str]
+    vin: Optional[str]
+    raw: str
+    data: Optional[Dict[str, Any]]
+
+
+class ReadStats:
+    """Throughput counters for one read"""
+
+    def __init__(self):
+        self.records = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.source_bytes = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = self.elapsed or 1e-9
+        return {
+            "records": self.records,
+            "skipped": self.skipped,
+            "source_mb": round(self.source_bytes / 1e6, 2),
+            "uncompressed_mb": round(self.bytes / 1e6, 2),
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(self.records / elapsed),
+            "source_mb_per_second": round(self.source_bytes / 1e6 / elapsed, 2),
+            "uncompressed_mb_per_second": round(self.bytes / 1e6 / elapsed, 2)
+        }
+
+
+def read_bulk_file(
+    path: str,
+    use_mmap: bool = False,
+    parse: bool = True,
+    stats: Optional[ReadStats] = None
+) -> Iterator[BulkRecord]:
+    """
+    Stream vehicle records from a bulk or delta file
+
+    Args:
+        path: File to read (format detected from its contents)
+        use_mmap: Memory-map the file rather than reading it through a buffer
+        parse: Parse each record into a dict; when False only registration
+               and VIN are extracted and data is None (faster for ingestion)
+        stats: Counters to update as records are read
+
+    Yields:
+        BulkRecord per non-blank line
+    """
+    if stats is None:
+        stats = ReadStats()
+    stats.source_bytes += os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        if f.read(len(ZIP_MAGIC)) == ZIP_MAGIC:
+            # Zip needs random access to its central directory, so it is
+            # opened here on the file itself rather than streamed
+            with zipfile.ZipFile(f) as archive:
+                for name in archive.namelist():
+                    if not name.endswith("/"):
+                        with archive.open(name) as member:
+                            yield from _read_stream(member, parse, stats)
+        elif use_mmap and os.path.getsize(path) > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                yield from _read_stream(mapped, parse, stats)
+        else:
+            f.seek(0)
+            yield from _read_stream(f, parse, stats)
+
+    stats.finished = time.perf_counter()
+
+
+def _read_stream(source: BinaryIO, parse: bool, stats: ReadStats) -> Iterator[BulkRecord]:
+    stream = io.BufferedReader(_Readable(source), buffer_size=READ_BUFFER_SIZE)
+    head = stream.peek(TAR_MAGIC_OFFSET + len(TAR_MAGIC))
+
+    if head.startswith(GZIP_MAGIC):
+        yield from _read_stream(gzip.GzipFile(fileobj=stream, mode="rb"), parse, stats)
+    elif head[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + len(TAR_MAGIC)] == TAR_MAGIC:
+        with tarfile.open(fileobj=stream, mode="r|") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield from _read_stream(archive.extractfile(member), parse, stats)
+    elif head.startswith(ZIP_MAGIC):
+        raise ValueError("Zip archives can't be read from inside another archive")
+    else:
+        yield from _read_lines(stream, parse, stats)
+
+
+def _read_lines(stream: BinaryIO, parse: bool, stats: ReadStats) -> Iterator[BulkRecord]:
+    for line in stream:
+        stats.bytes += len(line)
+        line = line.strip()
+        if not line:
+            continue
+
+        if parse:
+            data = json.loads(line)
+            registration = data.get("registration")
+            vin = data.get("vin")
+        else:
+            data = None
+            match = REGISTRATION_FIELD.search(line)
+            registration = match.group(1).decode() if match else None
+            match = VIN_FIELD.search(line)
+            vin = match.group(1).decode() if match else None
+
+        stats.records += 1
+        yield BulkRecord(registration, vin, line.decode("utf-8"), data)
+
+
+class _Readable(io.RawIOBase):
+    """Adapts files, mmaps and decompressors to io.BufferedReader"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer) -> int:
+        data = self.source.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a DVSA bulk file and report throughput")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--mmap", action="store_true", help="Memory-map input files")
+    parser.add_argument("--raw", action="store_true", help="Extract keys only; don't parse records")
+    parser.add_argument("--value", action="store_true", help="Score each vehicle with ValuationEngine")
+    args = parser.parse_args(argv)
+
+    engine = None
+    if args.value:
+        from valuation_engine import ValuationEngine
+        engine = ValuationEngine()
+
+    stats = ReadStats()
+    for path in args.files:
+        for record in read_bulk_file(path, use_mmap=args.mmap, parse=not args.raw or engine is not None, stats=stats):
+            if engine is not None:
+                try:
+                    engine.calculate_valuation(record.data, 0)
+                except Exception:
+                    stats.skipped += 1
+
+    for key, value in stats.stats().items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
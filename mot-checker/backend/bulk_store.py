@@ -0,0 +1,264 @@
+"""
+Local MOT history store
+Ingests the DVSA bulk-download files (full and delta) into an on-disk SQLite
+database indexed by registration and VIN, so lookups can be served locally
+
+Usage:
+    python bulk_store.py ingest --store mot.db bulk-file.json.gz
+    python bulk_store.py ingest --store mot.db --delta delta-file.json.gz
+    python bulk_store.py lookup --store mot.db AB12CDE
+"""
+
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+from datetime import datetime
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from bulk_reader import ReadStats, read_bulk_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (
+    registration TEXT PRIMARY KEY,
+    vin TEXT,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vehicles_vin ON vehicles (vin);
+CREATE TABLE IF NOT EXISTS ingested_files (
+    filename TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    records INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+INSERT_BATCH_SIZE = 5000
+
+
+class StoredVehicle(NamedTuple):
+    """One vehicle as stored, with when its file was ingested"""
+    registration: str
+    vin: Optional[str]
+    data: str  # JSON text as it appeared in the bulk file
+    updated_at: datetime
+
+
+def normalise_registration(registration: Optional[str]) -> Optional[str]:
+    if not registration:
+        return None
+    return registration.replace(" ", "").upper()
+
+
+def _stored_vehicle(row: Optional[Tuple[str, Optional[str], str, str]]) -> Optional[StoredVehicle]:
+    if row is None:
+        return None
+    return StoredVehicle(row[0], row[1], row[2], datetime.fromisoformat(row[3]))
+
+
+class MOTBulkStore:
+    """SQLite-backed MOT history store keyed by registration and VIN"""
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_raw_by_registration(self, registration: str) -> Optional[str]:
+        """Stored JSON text for a registration, or None"""
+        row = self.conn.execute(
+            "SELECT data FROM vehicles WHERE registration = ?",
+            (normalise_registration(registration),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_raw_by_vin(self, vin: str) -> Optional[str]:
+        """Stored JSON text for a VIN, or None"""
+        row = self.conn.execute(
+            "SELECT data FROM vehicles WHERE vin = ? ORDER BY updated_at DESC LIMIT 1",
+            (vin.upper(),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def has_registration(self, registration: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM vehicles WHERE registration = ?",
+            (normalise_registration(registration),)
+        ).fetchone()
+        return row is not None
+
+    def get_record_by_registration(self, registration: str) -> Optional[StoredVehicle]:
+        """Stored vehicle for a registration, or None"""
+        row = self.conn.execute(
+            "SELECT registration, vin, data, updated_at FROM vehicles WHERE registration = ?",
+            (normalise_registration(registration),)
+        ).fetchone()
+        return _stored_vehicle(row)
+
+    def get_record_by_vin(self, vin: str) -> Optional[StoredVehicle]:
+        """Stored vehicle for a VIN, or None"""
+        row = self.conn.execute(
+            "SELECT registration, vin, data, updated_at FROM vehicles WHERE vin = ? ORDER BY updated_at DESC LIMIT 1",
+            (vin.upper(),)
+        ).fetchone()
+        return _stored_vehicle(row)
+
+    def get_by_registration(self, registration: str) -> Optional[Dict[str, Any]]:
+        raw = self.get_raw_by_registration(registration)
+        return json.loads(raw) if raw is not None else None
+
+    def get_by_vin(self, vin: str) -> Optional[Dict[str, Any]]:
+        raw = self.get_raw_by_vin(vin)
+        return json.loads(raw) if raw is not None else None
+
+    def has_ingested(self, filename: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM ingested_files WHERE filename = ?",
+            (filename,)
+        ).fetchone()
+        return row is not None
+
+    def ingest(
+        self,
+        records: Iterable[Tuple[Optional[str], Optional[str], str]],
+        filename: str,
+        delta: bool = False
+    ) -> int:
+        """
+        Load (registration, vin, json_text) records in a single transaction
+
+        A full file replaces the whole store; a delta upserts its vehicles.
+        Files already ingested (by name) are skipped, so deltas can be
+        applied incrementally by re-running over a directory.
+
+        Returns:
+            Number of records written
+        """
+        if self.has_ingested(filename):
+            return 0
+
+        now = datetime.utcnow().isoformat()
+        count = 0
+        with self.conn:
+            if not delta:
+                self.conn.execute("DELETE FROM vehicles")
+
+            batch = []
+            for registration, vin, data in records:
+                registration = normalise_registration(registration)
+                if registration is None:
+                    continue
+                batch.append((registration, vin.upper() if vin else None, data, now))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    count += self._write(batch, delta)
+                    batch = []
+            count += self._write(batch, delta)
+            if not delta:
+                # Same rule for a full file, in one pass: the last record carrying a VIN keeps it
+                self.conn.execute(
+                    "UPDATE vehicles SET vin = NULL WHERE vin IS NOT NULL AND rowid NOT IN "
+                    "(SELECT MAX(rowid) FROM vehicles WHERE vin IS NOT NULL GROUP BY vin)"
+                )
+
+            self.conn.execute(
+                "INSERT INTO ingested_files (filename, kind, records, ingested_at) VALUES (?, ?, ?, ?)",
+                (filename, "delta" if delta else "bulk", count, now)
+            )
+        return count
+
+    def ingest_file(
+        self,
+        path: str,
+        delta: bool = False,
+        use_mmap: bool = False,
+        stats: Optional[ReadStats] = None
+    ) -> int:
+        """Stream a bulk or delta file into the store, keeping each record's original JSON text"""
+        records = (
+            (record.registration, record.vin, record.raw)
+            for record in read_bulk_file(path, use_mmap=use_mmap, parse=False, stats=stats)
+        )
+        return self.ingest(records, os.path.basename(path), delta=delta)
+
+    def _write(self, batch, delta: bool) -> int:
+        if delta:
+            # A VIN belongs to one plate: when a delta moves it (a plate transfer),
+            # the latest record keeps it and earlier ones, in the batch or stored, drop it
+            latest = {row[1]: row[0] for row in batch if row[1]}
+            batch = [
+                row if not row[1] or latest[row[1]] == row[0] else (row[0], None, row[2], row[3])
+                for row in batch
+            ]
+            self.conn.executemany(
+                "UPDATE vehicles SET vin = NULL WHERE vin = ? AND registration != ?",
+                latest.items()
+            )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO vehicles (registration, vin, data, updated_at) VALUES (?, ?, ?, ?)",
+            batch
+        )
+        return len(batch)
+
+    def count(self) -> int:
+        """Number of stored vehicles (a full scan; not for request paths)"""
+        return self.conn.execute("SELECT COUNT(*) FROM vehicles").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Most recently ingested file, for monitoring"""
+        last = self.conn.execute(
+            "SELECT filename, ingested_at FROM ingested_files ORDER BY ingested_at DESC LIMIT 1"
+        ).fetchone()
+        return {
+            "last_file": last[0] if last else None,
+            "last_ingested_at": last[1] if last else None
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local MOT history store")
+    parser.add_argument("--store", default=os.getenv("MOT_BULK_STORE_PATH", "mot_history.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Load bulk or delta files")
+    ingest.add_argument("files", nargs="+")
+    ingest.add_argument("--delta", action="store_true", help="Files are deltas (upsert, don't replace)")
+    ingest.add_argument("--mmap", action="store_true", help="Memory-map input files")
+
+    lookup = commands.add_parser("lookup", help="Print the stored history for a registration or VIN")
+    lookup.add_argument("key")
+    lookup.add_argument("--vin", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        store = MOTBulkStore(args.store)
+        for path in args.files:
+            stats = ReadStats()
+            count = store.ingest_file(path, delta=args.delta, use_mmap=args.mmap, stats=stats)
+            summary = stats.stats()
+            print(f"{path}: {count} records "
+                  f"({summary['records_per_second']:,} records/s, {summary['source_mb_per_second']} MB/s)")
+        print(f"{store.count()} vehicles stored")
+        store.close()
+    else:
+        store = MOTBulkStore(args.store, read_only=True)
+        data = store.get_by_vin(args.key) if args.vin else store.get_by_registration(args.key)
+        store.close()
+        if data is None:
+            print("Not found", file=sys.stderr)
+            return 1
+        print(json.dumps(data, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
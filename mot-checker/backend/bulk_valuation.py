@@ -0,0 +1,393 @@
+"""
+Bulk vehicle valuation engine
+Scores many MOT histories at once (dealer stock, auction lists) with the same
+rules as ValuationEngine, using NumPy arrays instead of per-vehicle loops
+"""
+
+from typing import Any, Dict, List, Sequence
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from repair_costs import classify_repair
+from valuation_engine import (
+    ValuationEngine,
+    FAILURE_TYPES,
+    REPAIR_TYPES
+)
+
+RECOMMENDATIONS = np.array([
+    "highly_recommended",
+    "recommended",
+    "acceptable_with_caution",
+    "risky",
+    "not_recommended",
+    "insufficient_data"
+])
+INSUFFICIENT_DATA = 5
+
+
+@lru_cache(maxsize=65536)
+def _parse_test_date(completed_date: str) -> datetime:
+    """strptime is slow and fleets share test dates, so parsed dates are memoized"""
+    return datetime.strptime(completed_date, "%Y.%m.%d")
+
+
+class BulkValuationResult:
+    """Columnar valuation results, one row per input vehicle"""
+
+    SCORE_NAMES = (
+        "mot_history",
+        "recent_failures",
+        "dangerous_defects",
+        "mileage_consistency",
+        "age_factor"
+    )
+
+    def __init__(
+        self,
+        asking_prices: np.ndarray,
+        scores: Dict[str, np.ndarray],
+        overall_score: np.ndarray,
+        recommendation: np.ndarray,
+        repairs_min: np.ndarray,
+        repairs_max: np.ndarray,
+        repairs_average: np.ndarray,
+        dangerous_defects: np.ndarray,
+        recent_failures: np.ndarray,
+        total_tests: np.ndarray,
+        errors: Dict[int, str]
+    ):
+        self.asking_prices = asking_prices
+        self.scores = scores
+        self.overall_score = overall_score
+        self.recommendation = recommendation
+        self.repairs_min = repairs_min
+        self.repairs_max = repairs_max
+        self.repairs_average = repairs_average
+        self.dangerous_defects = dangerous_defects
+        self.recent_failures = recent_failures
+        self.total_tests = total_tests
+        self.errors = errors  # Vehicle index -> error for histories that could not be scored
+
+    def __len__(self) -> int:
+        return len(self.overall_score)
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Compact valuation for one vehicle, matching ValuationEngine's fields"""
+        if index in self.errors:
+            return {"error": self.errors[index]}
+
+        recommendation = str(self.recommendation[index])
+        if recommendation == "insufficient_data":
+            return {"recommendation": recommendation, "score": 0}
+
+        asking_price = float(self.asking_prices[index])
+        repairs_average = round(float(self.repairs_average[index]), 2)
+        return {
+            "overall_score": round(float(self.overall_score[index]), 1),
+            "recommendation": recommendation,
+            "scores": {
+                name: round(float(self.scores[name][index]), 1)
+                for name in self.SCORE_NAMES
+            },
+            "asking_price": asking_price,
+            "estimated_repairs": repairs_average,
+            "estimated_repairs_min": round(float(self.repairs_min[index]), 2),
+            "estimated_repairs_max": round(float(self.repairs_max[index]), 2),
+            "total_estimated_cost": round(asking_price + repairs_average, 2),
+            "total_tests": int(self.total_tests[index]),
+            "recent_failures": int(self.recent_failures[index]),
+            "dangerous_defects_found": int(self.dangerous_defects[index])
+        }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [self.record(index) for index in range(len(self))]
+
+
+class BulkValuationEngine:
+    """Vectorized counterpart of ValuationEngine for scoring whole fleets"""
+
+    def __init__(self):
+        self.scalar_engine = ValuationEngine()
+        self.WEIGHTS = ValuationEngine.WEIGHTS
+
+    def calculate_valuations(
+        self,
+        histories: Sequence[Dict[str, Any]],
+        asking_prices: Sequence[float]
+    ) -> BulkValuationResult:
+        """
+        Value many vehicles at once
+
+        Args:
+            histories: MOT history data from DVLA, one per vehicle
+            asking_prices: Asking price for each vehicle
+
+        Returns:
+            Columnar results; BulkValuationResult.record(i) matches the
+            scores, recommendation and repair totals of
+            ValuationEngine.calculate_valuation for vehicle i
+        """
+        vehicle_count = len(histories)
+        columns = self._flatten(histories)
+        irregular = columns["irregular"]
+
+        test_vehicle = columns["test_vehicle"]
+        test_count = np.bincount(test_vehicle, minlength=vehicle_count)
+        passes = np.bincount(test_vehicle, weights=columns["passed"], minlength=vehicle_count)
+        recent_failed = np.bincount(test_vehicle, weights=columns["recent_failed"], minlength=vehicle_count)
+
+        defect_vehicle = columns["defect_vehicle"]
+        recent_failure_defects = np.bincount(
+            defect_vehicle, weights=columns["defect_failure"], minlength=vehicle_count
+        )
+        recent_dangerous = np.bincount(
+            defect_vehicle, weights=columns["defect_dangerous"], minlength=vehicle_count
+        )
+
+        repair_vehicle = columns["repair_vehicle"]
+        repairs_min = np.bincount(repair_vehicle, weights=columns["repair_min"], minlength=vehicle_count)
+        repairs_max = np.bincount(repair_vehicle, weights=columns["repair_max"], minlength=vehicle_count)
+        repairs_average = np.bincount(
+            repair_vehicle, weights=columns["repair_average"], minlength=vehicle_count
+        )
+        repair_dangerous = np.bincount(
+            repair_vehicle, weights=columns["repair_dangerous"], minlength=vehicle_count
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            history_score = np.where(test_count < 2, 50.0, (passes / test_count) * 100)
+
+        failure_score = np.select(
+            [
+                recent_failure_defects == 0,
+                recent_failure_defects <= 2,
+                recent_failure_defects <= 5,
+                recent_failure_defects <= 10
+            ],
+            [100.0, 80.0, 60.0, 40.0],
+            20.0
+        )
+        danger_score = np.select(
+            [recent_dangerous == 0, recent_dangerous == 1, recent_dangerous == 2],
+            [100.0, 70.0, 40.0],
+            10.0
+        )
+        mileage_score = self._mileage_scores(columns, vehicle_count)
+        age_score = np.select(
+            [test_count <= 2, test_count <= 5, test_count <= 10],
+            [90.0, 80.0, 70.0],
+            60.0
+        )
+
+        overall_score = (
+            history_score * self.WEIGHTS["mot_history"] +
+            failure_score * self.WEIGHTS["recent_failures"] +
+            danger_score * self.WEIGHTS["dangerous_defects"] +
+            mileage_score * self.WEIGHTS["mileage_consistency"] +
+            age_score * self.WEIGHTS["age_factor"]
+        )
+
+        recommendation_index = np.select(
+            [
+                test_count == 0,
+                (overall_score >= 80) & (repairs_average < 500),
+                (overall_score >= 70) & (repairs_average < 1000),
+                overall_score >= 60,
+                overall_score >= 40
+            ],
+            [INSUFFICIENT_DATA, 0, 1, 2, 3],
+            4
+        )
+
+        result = BulkValuationResult(
+            asking_prices=np.asarray(asking_prices, dtype=np.float64),
+            scores={
+                "mot_history": history_score,
+                "recent_failures": failure_score,
+                "dangerous_defects": danger_score,
+                "mileage_consistency": mileage_score,
+                "age_factor": age_score
+            },
+            overall_score=overall_score,
+            recommendation=RECOMMENDATIONS[recommendation_index],
+            repairs_min=repairs_min,
+            repairs_max=repairs_max,
+            repairs_average=repairs_average,
+            dangerous_defects=repair_dangerous,
+            recent_failures=recent_failed,
+            total_tests=test_count,
+            errors={}
+        )
+
+        # Histories the arrays can't represent faithfully are scored one at a time
+        for index in np.flatnonzero(irregular):
+            self._score_with_scalar_engine(result, int(index), histories, asking_prices)
+
+        return result
+
+    def _flatten(self, histories: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Flatten tests, recent defects and latest-test repairs into parallel arrays"""
+        test_vehicle = []
+        passed = []
+        recent_failed = []
+        odometer = []
+        completed_dates = []
+
+        defect_vehicle = []
+        defect_failure = []
+        defect_dangerous = []
+
+        repair_vehicle = []
+        repair_min = []
+        repair_max = []
+        repair_average = []
+        repair_dangerous = []
+
+        irregular = np.zeros(len(histories), dtype=bool)
+
+        for vehicle, mot_data in enumerate(histories):
+            mot_tests = mot_data.get("motTests", [])
+            try:
+                for position, test in enumerate(mot_tests):
+                    test_result = test.get("testResult")
+                    reading = test.get("odometerValue")
+                    completed_date = test.get("completedDate")
+
+                    if reading and completed_date:
+                        # Non-numeric readings compare differently; leave them to the scalar engine
+                        if (
+                            isinstance(reading, bool) or
+                            not isinstance(reading, (int, float)) or
+                            reading != reading  # NaN
+                        ):
+                            raise TypeError("non-numeric odometer reading")
+                        odometer.append(reading)
+                        completed_dates.append(completed_date)
+                    else:
+                        odometer.append(np.nan)
+                        completed_dates.append(None)
+
+                    test_vehicle.append(vehicle)
+                    passed.append(test_result == "PASSED")
+                    recent_failed.append(position < 3 and test_result == "FAILED")
+
+                    if position >= 3:
+                        continue
+
+                    for item in test.get("defects", []):
+                        item_type = item.get("type")
+                        if position < 2 and not isinstance(item.get("text", ""), str):
+                            raise TypeError("defect text is not a string")
+                        defect_vehicle.append(vehicle)
+                        defect_failure.append(item_type in FAILURE_TYPES)
+                        defect_dangerous.append(
+                            bool(item.get("dangerous", False)) or item_type == "DANGEROUS"
+                        )
+
+                        if position == 0 and item_type in REPAIR_TYPES:
+                            estimate = classify_repair(item.get("text", ""))
+                            repair_vehicle.append(vehicle)
+                            repair_min.append(estimate.min_cost)
+                            repair_max.append(estimate.max_cost)
+                            repair_average.append(estimate.average_cost)
+                            repair_dangerous.append(bool(item.get("dangerous", False)))
+            except (AttributeError, TypeError):
+                irregular[vehicle] = True
+
+        return {
+            "irregular": irregular,
+            "test_vehicle": np.array(test_vehicle, dtype=np.intp),
+            "passed": np.array(passed, dtype=np.float64),
+            "recent_failed": np.array(recent_failed, dtype=np.float64),
+            "odometer": np.array(odometer, dtype=np.float64),
+            "completed_dates": completed_dates,
+            "defect_vehicle": np.array(defect_vehicle, dtype=np.intp),
+            "defect_failure": np.array(defect_failure, dtype=np.float64),
+            "defect_dangerous": np.array(defect_dangerous, dtype=np.float64),
+            "repair_vehicle": np.array(repair_vehicle, dtype=np.intp),
+            "repair_min": np.array(repair_min, dtype=np.float64),
+            "repair_max": np.array(repair_max, dtype=np.float64),
+            "repair_average": np.array(repair_average, dtype=np.float64),
+            "repair_dangerous": np.array(repair_dangerous, dtype=np.float64)
+        }
+
+    def _mileage_scores(self, columns: Dict[str, np.ndarray], vehicle_count: int) -> np.ndarray:
+        """Mileage consistency score for every vehicle (0-100)"""
+        odometer = columns["odometer"]
+        with_reading = np.flatnonzero(~np.isnan(odometer))
+        reading_vehicle = columns["test_vehicle"][with_reading]
+        readings = odometer[with_reading]
+
+        reading_count = np.bincount(reading_vehicle, minlength=vehicle_count)
+
+        # Newer readings come first, so a later reading larger than the one before it went backwards
+        same_vehicle = reading_vehicle[:-1] == reading_vehicle[1:]
+        backwards = same_vehicle & (readings[:-1] < readings[1:])
+        went_backwards = np.bincount(
+            reading_vehicle[:-1][backwards], minlength=vehicle_count
+        ) > 0
+
+        # Newest and oldest reading per vehicle; only those two dates are parsed
+        vehicles, newest = np.unique(reading_vehicle, return_index=True)
+        oldest = np.append(newest[1:], len(reading_vehicle)) - 1
+
+        annual_mileage = np.full(vehicle_count, np.nan)
+        completed_dates = columns["completed_dates"]
+        for vehicle, newest_index, oldest_index in zip(vehicles, newest, oldest):
+            if reading_count[vehicle] < 2:
+                continue
+            try:
+                first_date = _parse_test_date(completed_dates[with_reading[oldest_index]])
+                last_date = _parse_test_date(completed_dates[with_reading[newest_index]])
+            except (TypeError, ValueError):
+                continue
+            years = (last_date - first_date).days / 365.25
+            if years > 0:
+                annual_mileage[vehicle] = (readings[newest_index] - readings[oldest_index]) / years
+
+        known = ~np.isnan(annual_mileage)
+        return np.select(
+            [
+                reading_count < 2,
+                went_backwards,
+                known & (annual_mileage < 5000),
+                known & (annual_mileage < 12000),
+                known & (annual_mileage < 20000),
+                known
+            ],
+            [50.0, 0.0, 90.0, 100.0, 70.0, 50.0],
+            75.0
+        )
+
+    def _score_with_scalar_engine(
+        self,
+        result: BulkValuationResult,
+        index: int,
+        histories: Sequence[Dict[str, Any]],
+        asking_prices: Sequence[float]
+    ) -> None:
+        try:
+            valuation = self.scalar_engine.calculate_valuation(histories[index], asking_prices[index])
+        except Exception as e:
+            result.errors[index] = f"{type(e).__name__}: {e}"
+            return
+
+        if valuation["recommendation"] == "insufficient_data":
+            # No scores or analysis to copy; the record is built from the recommendation alone
+            result.recommendation[index] = valuation["recommendation"]
+            return
+
+        for name in BulkValuationResult.SCORE_NAMES:
+            result.scores[name][index] = valuation["scores"][name]
+        result.overall_score[index] = valuation["overall_score"]
+        result.recommendation[index] = valuation["recommendation"]
+        financial = valuation["financial_analysis"]
+        result.repairs_min[index] = financial["estimated_repairs_min"]
+        result.repairs_max[index] = financial["estimated_repairs_max"]
+        result.repairs_average[index] = financial["estimated_repairs"]
+        result.dangerous_defects[index] = valuation["mot_summary"]["dangerous_defects_found"]
+        result.recent_failures[index] = valuation["mot_summary"]["recent_failures"]
+        result.total_tests[index] = valuation["mot_summary"]["total_tests"]
@@ -0,0 +1,159 @@
+"""
+In-process response cache
+Bounded LRU cache with per-entry time-to-live, used in front of DVSA lookups
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import time
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a TTL
+
+    With stale_ttl, expired entries are kept that much longer: get() treats
+    them as missing, but get_stale() still returns them, flagged as stale.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (value, expires_at, discard_at)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, float]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, discard_at = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if discard_at <= now:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_stale(self, key: Hashable, default: Any = None) -> Tuple[Any, bool]:
+        """
+        Return (value, stale) for key, including an expired value still
+        within its stale_ttl, or (default, False) if there is none
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default, False
+
+        value, expires_at, discard_at = entry
+        now = time.monotonic()
+        if discard_at <= now:
+            del self._entries[key]
+            self.misses += 1
+            return default, False
+
+        self._entries.move_to_end(key)
+        if expires_at <= now:
+            self.stale_hits += 1
+            return value, True
+        self.hits += 1
+        return value, False
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, stale_ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entries if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        discard_at = expires_at + (self.stale_ttl if stale_ttl is None else stale_ttl)
+        self._entries[key] = (value, expires_at, discard_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key from the cache and return its value"""
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def has_stale(self, key: Hashable) -> bool:
+        """True if get_stale() would return a value for key (counters and LRU order untouched)"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class CrossIndex:
+    """Bounded two-way VIN <-> registration mapping for recently seen vehicles"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.by_vin = TTLCache(max_entries, ttl)
+        self.by_registration = TTLCache(max_entries, ttl)
+
+    def link(self, vin: str, registration: str) -> Optional[str]:
+        """
+        Record that vin currently carries registration
+
+        Returns:
+            The registration vin previously carried, if it has changed
+            (a plate transfer), so stale entries keyed by it can be dropped
+        """
+        previous = self.by_vin.pop(vin)
+        if previous is not None and previous != registration:
+            self.by_registration.pop(previous)
+        else:
+            previous = None
+
+        old_vin = self.by_registration.pop(registration)
+        if old_vin is not None and old_vin != vin:
+            self.by_vin.pop(old_vin)
+
+        self.by_vin.set(vin, registration)
+        self.by_registration.set(registration, vin)
+        return previous
+
+    def registration_for(self, vin: str) -> Optional[str]:
+        return self.by_vin.get(vin)
+
+    def vin_for(self, registration: str) -> Optional[str]:
+        return self.by_registration.get(registration)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vehicles": len(self.by_vin),
+            "vin_hits": self.by_vin.hits,
+            "vin_misses": self.by_vin.misses
+        }
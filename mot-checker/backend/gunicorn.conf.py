@@ -0,0 +1,67 @@
+"""
+Gunicorn configuration for production
+Runs uvicorn workers, with the application imported once in the master and
+forked into the workers.
+
+Usage:
+    gunicorn main:app -c gunicorn.conf.py
+
+Rate limits, the DVLA token and cached histories are only shared between
+workers with STATE_BACKEND=redis, so the default is one worker per available
+CPU with Redis and a single worker without it. SERVER_WORKERS overrides this.
+"""
+
+import os
+
+
+def container_cpu_count() -> int:
+    """CPUs this process may use, honouring affinity and cgroup (docker --cpus) limits"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # cgroup v2 quota, e.g. "200000 100000" for two CPUs, or "max 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(int(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+bind = f"{os.getenv('SERVER_HOST', '0.0.0.0')}:{os.getenv('SERVER_PORT', '8000')}"
+shared_state = os.getenv("STATE_BACKEND", "memory").lower() == "redis"
+workers = int(os.getenv("SERVER_WORKERS") or 0) or (container_cpu_count() if shared_state else 1)
+
+# UvicornWorker picks uvloop and httptools when they are installed (uvicorn[standard])
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import main (and with it the valuation engine) once, before forking
+preload_app = True
+
+keepalive = int(os.getenv("SERVER_KEEPALIVE", "5"))  # seconds an idle connection is kept open
+backlog = int(os.getenv("SERVER_BACKLOG", "2048"))
+timeout = int(os.getenv("SERVER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+max_requests = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # Recycle workers after this many requests (0: never)
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    # Fail fast if the fast event loop and parser are missing
+    import httptools  # noqa: F401
+    import uvloop  # noqa: F401
+
+    if workers > 1 and not shared_state:
+        server.log.warning(
+            "%d workers with STATE_BACKEND=memory: each keeps its own rate limits, "
+            "DVLA token and cache, so the effective rate limit is %d times RATE_LIMIT_REQUESTS; "
+            "set STATE_BACKEND=redis",
+            workers, workers
+        )
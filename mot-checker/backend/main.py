@@ -3,27 +3,66 @@ MOT Checker Backend API
 Secure FastAPI application for checking MOT history via DVLA API
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, NamedTuple, Set, Tuple
+from datetime import datetime
+from contextlib import asynccontextmanager
 import httpx
+import asyncio
 import os
 import hashlib
-import time
-from collections import defaultdict
 import re
 import json
+import math
+import time
+import orjson
+
+from cache import CrossIndex, TTLCache
+from singleflight import SingleFlight
+from shared_state import StateError, create_state_backend
+from token_manager import TokenManager, TokenError
+from repair_costs import classification_cache_info, get_all_repair_costs
+from valuation_engine import ValuationEngine
+from bulk_store import MOTBulkStore
+from metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from resilience import CircuitBreaker, CircuitOpenError, ResilientUpstream
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown"""
+    global http_client, bulk_store
+    http_client = create_http_client()
+    if MOT_BULK_STORE_PATH and os.path.exists(MOT_BULK_STORE_PATH):
+        bulk_store = MOTBulkStore(MOT_BULK_STORE_PATH, read_only=True)
+    if DVLA_CLIENT_ID and DVLA_CLIENT_SECRET:
+        token_manager.start()
+    try:
+        yield
+    finally:
+        await token_manager.stop()
+        for task in list(background_refreshes):
+            task.cancel()
+        await asyncio.gather(*background_refreshes, return_exceptions=True)
+        await http_client.aclose()
+        http_client = None
+        if bulk_store is not None:
+            bulk_store.close()
+            bulk_store = None
+        await state.close()
+
 
 app = FastAPI(
     title="MOT Checker API",
     description="Secure API for MOT history checking and vehicle valuation",
     version="1.0.0",
     docs_url=None,  # Disable docs in production
-    redoc_url=None
+    redoc_url=None,
+    lifespan=lifespan
 )
 
 # Environment variables - DVLA OAuth2 Configuration
@@ -32,21 +71,157 @@ DVLA_CLIENT_SECRET = os.getenv("DVLA_CLIENT_SECRET", "")
 DVLA_API_KEY = os.getenv("DVLA_API_KEY", "")
 DVLA_SCOPE_URL = os.getenv("DVLA_SCOPE_URL", "https://tapi.dvsa.gov.uk/.default")
 DVLA_TOKEN_URL = os.getenv("DVLA_TOKEN_URL", "https://login.microsoftonline.com/a455b827-244f-4c97-b5b4-ce5d13b4d00c/oauth2/v2.0/token")
-DVLA_API_URL = "https://history.mot.api.gov.uk/v1/trade/vehicles/registration"
+DVLA_API_URL = os.getenv("DVLA_API_URL", "https://history.mot.api.gov.uk/v1/trade/vehicles/registration")
+DVLA_VIN_API_URL = os.getenv("DVLA_VIN_API_URL", "https://history.mot.api.gov.uk/v1/trade/vehicles/vin")
 
 API_SECRET_KEY = os.getenv("API_SECRET_KEY", "")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "https://mot.projectnetworks.co.uk").split(",")
 
-# Token cache
-token_cache = {
-    "access_token": None,
-    "expires_at": None
-}
+# Upstream HTTP client (shared connection pool for DVLA and token endpoints)
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "10.0"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5.0"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30.0"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "true").lower() == "true"
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage = defaultdict(list)
-RATE_LIMIT_REQUESTS = 10  # requests per minute
+http_client: Optional[httpx.AsyncClient] = None
+
+# DVSA upstream resilience (seconds): retries with jittered backoff, optional
+# hedged second requests after the recent p95, and a circuit breaker
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "2"))
+UPSTREAM_RETRY_BACKOFF = float(os.getenv("UPSTREAM_RETRY_BACKOFF", "0.2"))
+UPSTREAM_RETRY_MAX_BACKOFF = float(os.getenv("UPSTREAM_RETRY_MAX_BACKOFF", "2.0"))
+UPSTREAM_RETRY_DEADLINE = float(os.getenv("UPSTREAM_RETRY_DEADLINE", "10.0"))  # Total per lookup, retries included
+UPSTREAM_HEDGE = os.getenv("UPSTREAM_HEDGE", "false").lower() == "true"
+UPSTREAM_HEDGE_MIN_DELAY = float(os.getenv("UPSTREAM_HEDGE_MIN_DELAY", "0.05"))
+UPSTREAM_HEDGE_BUDGET = float(os.getenv("UPSTREAM_HEDGE_BUDGET", "0.1"))  # Most hedges per request
+UPSTREAM_BREAKER_FAILURES = int(os.getenv("UPSTREAM_BREAKER_FAILURES", "5"))  # Consecutive failed lookups, to open
+UPSTREAM_BREAKER_RECOVERY = float(os.getenv("UPSTREAM_BREAKER_RECOVERY", "30.0"))
+dvsa_upstream = ResilientUpstream(
+    retries=UPSTREAM_RETRIES,
+    backoff_base=UPSTREAM_RETRY_BACKOFF,
+    backoff_max=UPSTREAM_RETRY_MAX_BACKOFF,
+    deadline=UPSTREAM_RETRY_DEADLINE,
+    hedge=UPSTREAM_HEDGE,
+    hedge_min_delay=UPSTREAM_HEDGE_MIN_DELAY,
+    hedge_budget=UPSTREAM_HEDGE_BUDGET,
+    breaker=CircuitBreaker(
+        failure_threshold=UPSTREAM_BREAKER_FAILURES,
+        recovery_time=UPSTREAM_BREAKER_RECOVERY
+    )
+)
+
+# Rate limiting
+RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "10"))  # requests per minute
 RATE_LIMIT_WINDOW = 60  # seconds
+# Not limited by the middleware: health checks, metrics scrapes, and
+# single-vehicle lookups, which are counted in get_mot_history instead
+RATE_LIMIT_EXEMPT_PATHS = frozenset({"/health", "/metrics", "/api/mot/lookup", "/api/mot/valuation"})
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+# Shared state for rate limits, the DVLA token and cached histories:
+# "memory" for a single worker, "redis" to share it across workers and replicas
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "")
+state = create_state_backend(
+    STATE_BACKEND,
+    redis_url=REDIS_URL,
+    max_rate_limit_keys=RATE_LIMIT_MAX_CLIENTS
+)
+
+# OAuth2 token manager (seconds)
+DVLA_TOKEN_REFRESH_AHEAD = float(os.getenv("DVLA_TOKEN_REFRESH_AHEAD", "120"))
+DVLA_TOKEN_MAX_BACKOFF = float(os.getenv("DVLA_TOKEN_MAX_BACKOFF", "60"))
+token_manager = TokenManager(
+    token_url=DVLA_TOKEN_URL,
+    client_id=DVLA_CLIENT_ID,
+    client_secret=DVLA_CLIENT_SECRET,
+    scope=DVLA_SCOPE_URL,
+    get_client=lambda: get_http_client(),
+    refresh_ahead=DVLA_TOKEN_REFRESH_AHEAD,
+    max_backoff=DVLA_TOKEN_MAX_BACKOFF,
+    state=state
+)
+
+# MOT history cache (history changes at most a few times a year)
+MOT_CACHE_MAX_ENTRIES = int(os.getenv("MOT_CACHE_MAX_ENTRIES", "10000"))
+MOT_CACHE_TTL = int(os.getenv("MOT_CACHE_TTL", "21600"))  # seconds
+MOT_CACHE_NEGATIVE_TTL = int(os.getenv("MOT_CACHE_NEGATIVE_TTL", "300"))  # seconds, for 404s
+# Past its TTL a history is served stale (and refreshed in the background) for up to this long
+MOT_CACHE_MAX_STALENESS = int(os.getenv("MOT_CACHE_MAX_STALENESS", "86400"))  # seconds, 0 to disable
+MOT_CACHE_REFRESH_RETRY = int(os.getenv("MOT_CACHE_REFRESH_RETRY", "60"))  # seconds after a failed refresh
+mot_cache = TTLCache(max_entries=MOT_CACHE_MAX_ENTRIES, ttl=MOT_CACHE_TTL, stale_ttl=MOT_CACHE_MAX_STALENESS)
+VEHICLE_NOT_FOUND = object()  # Cached marker for registrations DVSA does not know
+mot_flights = SingleFlight()  # Concurrent lookups of one plate share an upstream call
+# VIN <-> registration for cached histories, so either key finds the other's entry
+vehicle_index = CrossIndex(max_entries=MOT_CACHE_MAX_ENTRIES, ttl=MOT_CACHE_TTL + MOT_CACHE_MAX_STALENESS)
+# Registrations whose background refresh failed recently, so each request does not retry it
+refresh_failures = TTLCache(max_entries=MOT_CACHE_MAX_ENTRIES, ttl=MOT_CACHE_REFRESH_RETRY)
+background_refreshes: Set[asyncio.Task] = set()  # Strong references until each refresh finishes
+
+# Valuation engine (stateless, so one instance serves every request)
+valuation_engine = ValuationEngine()
+
+# Local store built from the DVSA bulk-download files (see bulk_store.py)
+MOT_BULK_STORE_PATH = os.getenv("MOT_BULK_STORE_PATH", "")
+bulk_store: Optional[MOTBulkStore] = None
+
+# Repair cost table (static until redeployed), cacheable by clients and nginx
+REPAIR_COSTS_MAX_AGE = int(os.getenv("REPAIR_COSTS_MAX_AGE", "3600"))  # seconds
+
+# Prometheus metrics (per worker), served at /metrics
+REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds",
+    "HTTP request latency by method, route and status",
+    ["method", "route", "status"]
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "upstream_request_seconds",
+    "DVSA API request latency",
+    ["endpoint"]
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "upstream_responses",
+    "DVSA API responses by status code (error: no response)",
+    ["endpoint", "status"]
+)
+RATE_LIMITED = REGISTRY.counter("rate_limited_requests", "Requests rejected by the rate limiter")
+REGISTRY.counter("mot_cache_hits", "MOT history cache hits", function=lambda: mot_cache.hits)
+REGISTRY.counter("mot_cache_misses", "MOT history cache misses", function=lambda: mot_cache.misses)
+REGISTRY.counter(
+    "mot_cache_stale_hits",
+    "MOT histories served stale while being refreshed",
+    function=lambda: mot_cache.stale_hits
+)
+REGISTRY.gauge("mot_cache_entries", "MOT histories currently cached", function=lambda: len(mot_cache))
+STALE_REFRESHES = REGISTRY.counter(
+    "mot_stale_refreshes",
+    "Background refreshes of stale MOT histories by result",
+    ["result"]
+)
+REGISTRY.gauge(
+    "upstream_circuit_state",
+    "DVSA circuit breaker state (0 closed, 1 half-open, 2 open)",
+    function=lambda: ("closed", "half_open", "open").index(dvsa_upstream.breaker.state)
+)
+REGISTRY.counter(
+    "upstream_circuit_rejections",
+    "DVSA requests failed fast by the open circuit",
+    function=lambda: dvsa_upstream.breaker.rejected
+)
+REGISTRY.counter("upstream_retries", "DVSA requests retried", function=lambda: dvsa_upstream.retried)
+REGISTRY.counter("upstream_hedges", "Hedged second DVSA requests sent", function=lambda: dvsa_upstream.hedged)
+REGISTRY.counter(
+    "upstream_hedge_wins",
+    "Hedged DVSA requests that answered before the original",
+    function=lambda: dvsa_upstream.hedge_wins
+)
+
+# Batch lookups
+MOT_BATCH_MAX_ITEMS = int(os.getenv("MOT_BATCH_MAX_ITEMS", "200"))
+MOT_BATCH_CONCURRENCY = int(os.getenv("MOT_BATCH_CONCURRENCY", "10"))  # Upstream calls in flight per batch
+MOT_STREAM_MAX_ITEMS = int(os.getenv("MOT_STREAM_MAX_ITEMS", "500"))
 
 # CORS middleware
 app.add_middleware(
@@ -57,9 +232,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Trusted host middleware
+class TrustedHostExceptMetrics(TrustedHostMiddleware):
+    """Host header check for everything but /metrics, which Prometheus scrapes by container name or IP"""
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Trusted host middleware (nginx does not proxy /metrics, so only internal scrapes reach it)
 app.add_middleware(
-    TrustedHostMiddleware,
+    TrustedHostExceptMetrics,
     allowed_hosts=["mot.projectnetworks.co.uk", "api.projectnetworks.co.uk", "localhost", "127.0.0.1", "192.168.1.3"]
 )
 
@@ -78,10 +263,53 @@ class MOTRequest(BaseModel):
         return v
 
 
+class VINRequest(BaseModel):
+    """Request model for MOT lookup by vehicle identification number"""
+    vin: str = Field(..., min_length=5, max_length=24)
+    
+    @validator('vin')
+    def validate_vin(cls, v):
+        v = v.replace(" ", "").upper()
+        # Usually 17 characters, but older vehicles can have shorter VINs
+        if not re.match(r'^[A-Z0-9]{5,20}$', v):
+            raise ValueError('Invalid VIN format')
+        return v
+
+
 class ValuationRequest(BaseModel):
     """Request model for vehicle valuation"""
     registration: str
     asking_price: float = Field(..., gt=0)
+    # Token from a previous /api/mot/lookup; when it still matches, the history is not resent
+    lookup_token: Optional[str] = Field(None, max_length=64)
+
+
+class BatchItem(BaseModel):
+    """Single registration within a batch request"""
+    registration: str = Field(..., min_length=1, max_length=16)
+    asking_price: Optional[float] = Field(None, gt=0)
+
+
+class BatchRequest(BaseModel):
+    """Request model for batch MOT lookup and valuation"""
+    items: List[BatchItem] = Field(..., min_length=1, max_length=MOT_BATCH_MAX_ITEMS)
+    include_history: bool = True
+
+
+class StreamRequest(BaseModel):
+    """Request model for streamed multi-registration lookups"""
+    items: List[BatchItem] = Field(..., min_length=1, max_length=MOT_STREAM_MAX_ITEMS)
+    include_history: bool = False
+
+
+class MOTHistory(NamedTuple):
+    """MOT history for one registration as fetched from DVSA"""
+    registration: str
+    data: Dict[str, Any]
+    raw: bytes  # Response body as received, for passing through without re-encoding
+    lookup_token: str
+    fetched_at: datetime
+    stale: bool = False  # Served from cache past its TTL while a refresh runs
 
 
 class RFYItem(BaseModel):
@@ -102,23 +330,49 @@ class MOTTest(BaseModel):
     rfrAndComments: Optional[List[RFYItem]] = []
 
 
-def rate_limit_check(client_id: str) -> bool:
+async def rate_limit_check(client_id: str) -> bool:
     """Check if client has exceeded rate limit"""
-    current_time = time.time()
-    
-    # Clean old entries
-    rate_limit_storage[client_id] = [
-        timestamp for timestamp in rate_limit_storage[client_id]
-        if current_time - timestamp < RATE_LIMIT_WINDOW
-    ]
-    
-    # Check limit
-    if len(rate_limit_storage[client_id]) >= RATE_LIMIT_REQUESTS:
-        return False
-    
-    # Add current request
-    rate_limit_storage[client_id].append(current_time)
-    return True
+    try:
+        return await state.allow(client_id, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW)
+    except StateError:
+        # Fail open rather than reject everyone while the state store is down
+        return True
+
+
+def rate_limit_exceeded() -> HTTPException:
+    RATE_LIMITED.inc()
+    return HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
+
+
+async def acquire_lookups(client_id: str, count: int) -> int:
+    """Charge count upstream lookups to the client's rate limit; returns how many it may make"""
+    if count == 0:
+        return 0
+    try:
+        return await state.acquire(client_id, RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, count)
+    except StateError:
+        return count  # Fail open, as rate_limit_check does
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled, keep-alive client used for all upstream calls"""
+    return httpx.AsyncClient(
+        http2=UPSTREAM_HTTP2,
+        timeout=httpx.Timeout(UPSTREAM_TIMEOUT, connect=UPSTREAM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+            keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY
+        )
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it if the app lifespan has not run"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
 
 
 def get_client_id(request: Request) -> str:
@@ -130,43 +384,321 @@ def get_client_id(request: Request) -> str:
 
 async def get_dvla_access_token() -> str:
     """Get OAuth2 access token for DVLA API"""
-    # Check if we have a valid cached token
-    if token_cache["access_token"] and token_cache["expires_at"]:
-        if datetime.utcnow() < token_cache["expires_at"]:
-            return token_cache["access_token"]
-    
-    # Request new token
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                DVLA_TOKEN_URL,
-                data={
-                    "client_id": DVLA_CLIENT_ID,
-                    "client_secret": DVLA_CLIENT_SECRET,
-                    "scope": DVLA_SCOPE_URL,
-                    "grant_type": "client_credentials"
-                },
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded"
-                },
-                timeout=10.0
-            )
-            
-            response.raise_for_status()
-            token_data = response.json()
-            
-            # Cache the token (expires_in is in seconds)
-            token_cache["access_token"] = token_data["access_token"]
-            # Set expiry 5 minutes before actual expiry for safety
-            expires_in = token_data.get("expires_in", 3600) - 300
-            token_cache["expires_at"] = datetime.utcnow() + timedelta(seconds=expires_in)
-            
-            return token_data["access_token"]
-            
-    except httpx.HTTPError as e:
+        return await token_manager.get_token()
+    except TokenError as e:
         raise HTTPException(status_code=500, detail=f"Failed to get DVLA access token: {str(e)}")
 
 
+async def get_mot_history(registration: str, client_id: Optional[str] = None) -> MOTHistory:
+    """
+    Get MOT history for a registration, serving repeat lookups from cache
+    
+    A cached history past its TTL (but within MOT_CACHE_MAX_STALENESS) is
+    returned at once, flagged stale, while it is refreshed in the background.
+    
+    With client_id, the lookup is also counted against that client's rate
+    limit; on a local miss the check reads the shared cache in the same
+    round trip.
+    """
+    cached, stale = mot_cache.get_stale(registration)
+    if cached is None:
+        cached = get_local_mot_history(registration)
+    
+    if cached is None:
+        if client_id is None:
+            return await mot_flights.do(registration, lambda: load_mot_history(registration))
+        shared, checked = await rate_limit_and_load_shared(client_id, registration)
+        if shared is not None:
+            return shared
+        # The shared cache has just been checked, unless the state store was unreachable
+        load = fetch_mot_history_upstream if checked else load_mot_history
+        return await mot_flights.do(registration, lambda: load(registration))
+    
+    if client_id is not None and not await rate_limit_check(client_id):
+        raise rate_limit_exceeded()
+    if cached is VEHICLE_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    if stale:
+        refresh_in_background(registration)
+        return cached._replace(stale=True)
+    return cached
+
+
+async def load_mot_history(registration: str) -> MOTHistory:
+    """Load a history missing from the local cache: shared cache first, then DVSA"""
+    shared = await load_shared_history(registration)
+    if shared is not None:
+        return shared
+    return await fetch_mot_history_upstream(registration)
+
+
+def refresh_in_background(registration: str) -> None:
+    """Start refreshing a stale history unless a load is running or recently failed"""
+    if registration in mot_flights or registration in refresh_failures:
+        return
+    
+    task = asyncio.ensure_future(refresh_mot_history(registration))
+    background_refreshes.add(task)
+    task.add_done_callback(background_refreshes.discard)
+
+
+async def refresh_mot_history(registration: str) -> None:
+    """Replace a stale cache entry; if that fails the stale copy keeps being served"""
+    try:
+        # A vehicle in the bulk store is re-read from it; only misses go to DVSA
+        if get_local_mot_history(registration) is None:
+            await mot_flights.do(registration, lambda: load_mot_history(registration))
+    except HTTPException as e:
+        if e.status_code == 404:
+            # Now cached as not found, replacing the stale history
+            STALE_REFRESHES.inc("not_found")
+            return
+        refresh_failures.set(registration, True)
+        STALE_REFRESHES.inc("failed")
+    except Exception:
+        # Nobody awaits this task, so record the failure rather than raise it
+        refresh_failures.set(registration, True)
+        STALE_REFRESHES.inc("failed")
+    else:
+        STALE_REFRESHES.inc("refreshed")
+
+
+async def get_mot_history_by_vin(vin: str) -> MOTHistory:
+    """Get MOT history for a VIN, serving it from the cached entry of a vehicle already seen with it"""
+    registration = vehicle_index.registration_for(vin)
+    if registration is not None:
+        cached, stale = mot_cache.get_stale(registration)
+        if isinstance(cached, MOTHistory):
+            if stale:
+                refresh_in_background(registration)
+                return cached._replace(stale=True)
+            return cached
+    
+    if mot_cache.get(f"vin:{vin}") is VEHICLE_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    if bulk_store is not None:
+        record = bulk_store.get_record_by_vin(vin)
+        if record is not None:
+            history = make_mot_history(record.registration, record.data.encode(), fetched_at=record.updated_at)
+            return cache_history(history, vin)
+    
+    return await mot_flights.do(
+        f"vin:{vin}",
+        lambda: fetch_mot_history_upstream_by_vin(vin)
+    )
+
+
+def make_mot_history(
+    registration: Optional[str],
+    body: bytes,
+    data: Optional[Dict[str, Any]] = None,
+    fetched_at: Optional[datetime] = None
+) -> MOTHistory:
+    """Build a MOTHistory from a DVSA response body (fetched_at defaults to now)"""
+    return MOTHistory(
+        registration=(registration or "").replace(" ", "").upper(),
+        data=orjson.loads(body) if data is None else data,
+        raw=body,
+        lookup_token=hashlib.sha256(body).hexdigest()[:32],
+        fetched_at=fetched_at or datetime.utcnow()
+    )
+
+
+def cache_history(history: MOTHistory, vin: Optional[str] = None) -> MOTHistory:
+    """
+    Cache a history under its registration and cross-index it by VIN
+    
+    DVSA histories do not include the VIN, so it is only indexed when the
+    source knows it (a VIN lookup or a bulk-store record).
+    """
+    if not history.registration:
+        return history
+    
+    mot_cache.set(history.registration, history)
+    if vin:
+        transferred_from = vehicle_index.link(vin.upper(), history.registration)
+        if transferred_from is not None:
+            # The plate has moved off this vehicle; its old entry describes another car now
+            mot_cache.pop(transferred_from)
+    return history
+
+
+def served_locally(registration: str) -> bool:
+    """True if a lookup would be answered by this worker's cache or the bulk store, without DVSA"""
+    return mot_cache.has_stale(registration) or (
+        bulk_store is not None and bulk_store.has_registration(registration)
+    )
+
+
+def get_local_mot_history(registration: str) -> Optional[MOTHistory]:
+    """Serve a registration from the local bulk store, if one is configured and has it"""
+    if bulk_store is None:
+        return None
+    
+    record = bulk_store.get_record_by_registration(registration)
+    if record is None:
+        return None
+    
+    # Dated by the bulk file it came from, not by this lookup
+    history = make_mot_history(registration, record.data.encode(), fetched_at=record.updated_at)
+    return cache_history(history, record.vin)
+
+
+async def load_shared_history(registration: str) -> Optional[MOTHistory]:
+    """Fetch a history another worker stored in the shared state backend"""
+    if not state.shared:
+        return None
+    
+    try:
+        body = await state.get(f"history:{registration}")
+    except StateError:
+        return None
+    
+    return shared_history(registration, body)
+
+
+async def rate_limit_and_load_shared(client_id: str, registration: str) -> Tuple[Optional[MOTHistory], bool]:
+    """
+    Count a lookup against the client's rate limit and read the shared cache, in one round trip
+    
+    Returns the shared history (if any) and whether the shared cache was
+    actually read; raises 429 if the client is over its limit.
+    """
+    if not state.shared:
+        if not await rate_limit_check(client_id):
+            raise rate_limit_exceeded()
+        return None, True
+    
+    try:
+        allowed, body = await state.allow_and_get(
+            client_id,
+            RATE_LIMIT_REQUESTS,
+            RATE_LIMIT_WINDOW,
+            f"history:{registration}"
+        )
+    except StateError:
+        # Fail open, as rate_limit_check does
+        return None, False
+    
+    if not allowed:
+        raise rate_limit_exceeded()
+    return shared_history(registration, body), True
+
+
+def shared_history(registration: str, body: Optional[bytes]) -> Optional[MOTHistory]:
+    """Cache a body read from the shared state backend (an empty body records a 404)"""
+    if body is None:
+        return None
+    if body == b"":
+        mot_cache.set(registration, VEHICLE_NOT_FOUND, ttl=MOT_CACHE_NEGATIVE_TTL, stale_ttl=0)
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return cache_history(make_mot_history(registration, body))
+
+
+async def share_history(registration: str, body: bytes, ttl: float) -> None:
+    """Store a DVSA response body for other workers (an empty body records a 404)"""
+    if not state.shared:
+        return
+    
+    try:
+        await state.set(f"history:{registration}", body, ttl)
+    except StateError:
+        pass
+
+
+async def fetch_dvsa_vehicle(url: str, endpoint: str) -> httpx.Response:
+    """
+    GET a vehicle resource from the DVSA API with OAuth2 and API key headers
+    
+    Transient failures are retried; while the circuit breaker is open the
+    call fails fast with a 503 instead of waiting on DVSA.
+    """
+    # Get OAuth2 access token
+    access_token = await get_dvla_access_token()
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "X-API-Key": DVLA_API_KEY,
+        "Accept": "application/json"
+    }
+    
+    async def send(budget: float) -> httpx.Response:
+        # Each attempt gets only what is left of the deadline (ResilientUpstream also cancels it then)
+        timeout = httpx.Timeout(min(UPSTREAM_TIMEOUT, budget), connect=min(UPSTREAM_CONNECT_TIMEOUT, budget))
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().get(url, headers=headers, timeout=timeout)
+        except httpx.HTTPError:
+            UPSTREAM_RESPONSES.inc(endpoint, "error")
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint)
+        UPSTREAM_RESPONSES.inc(endpoint, str(response.status_code))
+        return response
+    
+    try:
+        response = await dvsa_upstream.request(send)
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="DVLA API temporarily unavailable",
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    
+    if response.status_code == 403:
+        raise HTTPException(status_code=403, detail="DVLA API access denied")
+    
+    return response
+
+
+async def fetch_mot_history_upstream(registration: str) -> MOTHistory:
+    """Fetch MOT history from the DVSA API and store the outcome in the cache"""
+    response = await fetch_dvsa_vehicle(f"{DVLA_API_URL}/{registration}", "registration")
+    
+    if response.status_code == 404:
+        mot_cache.set(registration, VEHICLE_NOT_FOUND, ttl=MOT_CACHE_NEGATIVE_TTL, stale_ttl=0)
+        await share_history(registration, b"", MOT_CACHE_NEGATIVE_TTL)
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    response.raise_for_status()
+    history = cache_history(make_mot_history(registration, response.content))
+    await share_history(registration, response.content, MOT_CACHE_TTL)
+    return history
+
+
+async def fetch_mot_history_upstream_by_vin(vin: str) -> MOTHistory:
+    """Fetch MOT history by VIN from the DVSA API and index it under its current registration"""
+    response = await fetch_dvsa_vehicle(f"{DVLA_VIN_API_URL}/{vin}", "vin")
+    
+    if response.status_code == 404:
+        mot_cache.set(f"vin:{vin}", VEHICLE_NOT_FOUND, ttl=MOT_CACHE_NEGATIVE_TTL, stale_ttl=0)
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    history = cache_history(make_mot_history(data.get("registration"), response.content, data), vin)
+    if history.registration:
+        await share_history(history.registration, response.content, MOT_CACHE_TTL)
+    return history
+
+
+def json_response_with_raw(
+    content: Dict[str, Any],
+    raw_fields: Dict[str, bytes],
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON response with already-encoded values (such as DVSA response bodies)
+    inserted verbatim after content's fields, so they are not re-serialized
+    """
+    body = orjson.dumps(content)
+    extra = b",".join(orjson.dumps(key) + b":" + value for key, value in raw_fields.items())
+    if extra:
+        body = body[:-1] + (b"," if len(body) > 2 else b"") + extra + b"}"
+    return Response(body, media_type="application/json", headers=headers)
+
+
 async def verify_api_key(x_api_key: str = Header(...)):
     """Verify API key from header"""
     if not API_SECRET_KEY:
@@ -181,13 +713,13 @@ async def verify_api_key(x_api_key: str = Header(...)):
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
-    # Skip rate limiting for health check
-    if request.url.path == "/health":
+    if request.url.path in RATE_LIMIT_EXEMPT_PATHS:
         return await call_next(request)
     
     client_id = get_client_id(request)
     
-    if not rate_limit_check(client_id):
+    if not await rate_limit_check(client_id):
+        RATE_LIMITED.inc()
         return JSONResponse(
             status_code=429,
             content={"detail": "Rate limit exceeded. Please try again later."}
@@ -197,6 +729,10 @@ async def rate_limit_middleware(request: Request, call_next):
     return response
 
 
+# Added last so it is outermost and also times rate-limited requests
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -213,10 +749,24 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "dvla_configured": bool(DVLA_CLIENT_ID and DVLA_CLIENT_SECRET and DVLA_API_KEY)
+        "dvla_configured": bool(DVLA_CLIENT_ID and DVLA_CLIENT_SECRET and DVLA_API_KEY),
+        "mot_cache": mot_cache.stats(),
+        "mot_coalescing": mot_flights.stats(),
+        "vin_index": vehicle_index.stats(),
+        "dvla_token": token_manager.stats(),
+        "dvsa_upstream": dvsa_upstream.stats(),
+        "shared_state": state.stats(),
+        "repair_classification": classification_cache_info(),
+        "bulk_store": bulk_store.stats() if bulk_store is not None else None
     }
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics for the worker that serves the scrape"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/api/mot/lookup")
 async def lookup_mot(
     mot_request: MOTRequest,
@@ -229,36 +779,54 @@ async def lookup_mot(
         raise HTTPException(status_code=500, detail="DVLA API not configured")
     
     try:
-        # Get OAuth2 access token
-        access_token = await get_dvla_access_token()
+        history = await get_mot_history(mot_request.registration, get_client_id(request))
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{DVLA_API_URL}/{mot_request.registration}",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "X-API-Key": DVLA_API_KEY,
-                    "Accept": "application/json"
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Vehicle not found")
-            
-            if response.status_code == 403:
-                raise HTTPException(status_code=403, detail="DVLA API access denied")
-            
-            response.raise_for_status()
-            mot_data = response.json()
-            
-            # Process and enrich the data
-            return {
+        # Process and enrich the data
+        return json_response_with_raw(
+            {
                 "registration": mot_request.registration,
-                "data": mot_data,
+                "vin": vehicle_index.vin_for(mot_request.registration),
+                "lookup_token": history.lookup_token,
+                "processed_at": datetime.utcnow().isoformat(),
+                "fetched_at": history.fetched_at.isoformat(),
+                "stale": history.stale,
+                "last_updated": "2025-12-16"
+            },
+            {"data": history.raw},
+            headers={"ETag": f'"{history.lookup_token}"'}
+        )
+            
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching MOT data: {str(e)}")
+
+
+@app.post("/api/mot/lookup/vin")
+async def lookup_mot_by_vin(
+    vin_request: VINRequest,
+    request: Request
+):
+    """
+    Look up MOT history for a vehicle by VIN
+    """
+    if not DVLA_CLIENT_ID or not DVLA_CLIENT_SECRET:
+        raise HTTPException(status_code=500, detail="DVLA API not configured")
+    
+    try:
+        history = await get_mot_history_by_vin(vin_request.vin)
+        
+        return json_response_with_raw(
+            {
+                "registration": history.registration or None,
+                "vin": vin_request.vin,
+                "lookup_token": history.lookup_token,
                 "processed_at": datetime.utcnow().isoformat(),
+                "fetched_at": history.fetched_at.isoformat(),
+                "stale": history.stale,
                 "last_updated": "2025-12-16"
-            }
+            },
+            {"data": history.raw},
+            headers={"ETag": f'"{history.lookup_token}"'}
+        )
             
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Error fetching MOT data: {str(e)}")
@@ -272,67 +840,303 @@ async def calculate_valuation(
     """
     Calculate vehicle valuation based on MOT history
     Returns assessment of whether the asking price is reasonable
+    
+    If lookup_token matches the history returned by an earlier lookup,
+    that history is valued and left out of the response.
     """
     # First get MOT data
     mot_request = MOTRequest(registration=valuation_request.registration)
     
     try:
-        # Get OAuth2 access token
-        access_token = await get_dvla_access_token()
-        
-        # Get MOT history
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{DVLA_API_URL}/{valuation_request.registration}",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "X-API-Key": DVLA_API_KEY,
-                    "Accept": "application/json"
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Vehicle not found")
-            
-            response.raise_for_status()
-            mot_data = response.json()
+        # Get MOT history (shared with /api/mot/lookup, so usually a cache hit)
+        history = await get_mot_history(mot_request.registration, get_client_id(request))
         
         # Calculate valuation metrics
-        from valuation_engine import ValuationEngine
-        engine = ValuationEngine()
-        valuation_result = engine.calculate_valuation(
-            mot_data,
+        valuation_result = valuation_engine.calculate_valuation(
+            history.data,
             valuation_request.asking_price
         )
         
-        return {
+        result = {
             "registration": valuation_request.registration,
             "asking_price": valuation_request.asking_price,
-            "data": mot_data,
+            "lookup_token": history.lookup_token,
             "valuation": valuation_result,
             "processed_at": datetime.utcnow().isoformat(),
+            "fetched_at": history.fetched_at.isoformat(),
+            "stale": history.stale,
             "last_updated": "2025-12-16"
         }
+        if valuation_request.lookup_token == history.lookup_token:
+            return ORJSONResponse(result)
+        return json_response_with_raw(result, {"data": history.raw})
         
     except httpx.HTTPError as e:
         raise HTTPException(status_code=500, detail=f"Error calculating valuation: {str(e)}")
 
 
+def normalise_registration(registration: str) -> Optional[str]:
+    """Return the canonical form of a registration, or None if it is invalid"""
+    try:
+        return MOTRequest(registration=registration).registration
+    except ValueError:
+        return None
+
+
+async def fetch_batch_history(registration: str):
+    """Get MOT history for a batch item, returning the HTTPException instead of raising it"""
+    try:
+        return await get_mot_history(registration)
+    except HTTPException as e:
+        return e
+    except httpx.HTTPError as e:
+        return HTTPException(status_code=500, detail=f"Error fetching MOT data: {str(e)}")
+
+
+def batch_item_result(
+    item: BatchItem,
+    registration: Optional[str],
+    history,
+    include_history: bool
+) -> Dict[str, Any]:
+    """Build the result (or error) entry for one batch item"""
+    if registration is None:
+        return {
+            "registration": item.registration,
+            "error": {"status_code": 422, "detail": "Invalid UK registration format"}
+        }
+    
+    if isinstance(history, HTTPException):
+        return {
+            "registration": registration,
+            "error": {"status_code": history.status_code, "detail": history.detail}
+        }
+    
+    result = {
+        "registration": registration,
+        "lookup_token": history.lookup_token,
+        "stale": history.stale
+    }
+    if include_history:
+        result["data"] = history.data
+    if item.asking_price is not None:
+        result["asking_price"] = item.asking_price
+        result["valuation"] = valuation_engine.calculate_valuation(history.data, item.asking_price)
+    return result
+
+
+async def iter_batch_results(
+    items: List[BatchItem],
+    include_history: bool,
+    concurrency: int,
+    client_id: Optional[str] = None
+):
+    """
+    Yield (index, result) for each item as soon as its lookup completes
+    
+    A fixed pool of workers pulls items in order, so at most `concurrency`
+    lookups are in flight and only finished results waiting to be consumed
+    are held in memory. Repeated plates share upstream calls through the
+    cache and request coalescing.
+    
+    With client_id, each distinct plate not held locally is charged to the
+    client's rate limit as it comes up; once the limit is reached, the
+    remaining uncached plates get a 429 error instead of a lookup.
+    """
+    finished: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    pending = iter(enumerate(items))
+    decisions: Dict[str, asyncio.Future] = {}
+    exhausted = False
+    
+    async def charge() -> bool:
+        nonlocal exhausted
+        if exhausted:
+            return False
+        if await acquire_lookups(client_id, 1):
+            return True
+        exhausted = True
+        RATE_LIMITED.inc()
+        return False
+    
+    async def lookup_allowed(registration: str) -> bool:
+        if client_id is None or served_locally(registration):
+            return True
+        # Repeats of a plate share the first decision, and are not charged again
+        decision = decisions.get(registration)
+        if decision is None:
+            decision = decisions[registration] = asyncio.ensure_future(charge())
+        return await decision
+    
+    async def worker():
+        for index, item in pending:
+            try:
+                registration = normalise_registration(item.registration)
+                if registration is None:
+                    history = None
+                elif await lookup_allowed(registration):
+                    history = await fetch_batch_history(registration)
+                else:
+                    history = HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
+                result = batch_item_result(item, registration, history, include_history)
+            except Exception:
+                result = {
+                    "registration": item.registration,
+                    "error": {"status_code": 500, "detail": "Internal error"}
+                }
+            await finished.put((index, result))
+    
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(items)))]
+    try:
+        for _ in range(len(items)):
+            yield await finished.get()
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+@app.post("/api/mot/batch")
+async def batch_lookup(
+    batch_request: BatchRequest,
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Look up (and optionally value) many vehicles in one request
+    Repeated plates are fetched once; each item gets its own result or error
+    
+    Every distinct plate not already held locally counts against the
+    client's rate limit; plates beyond what it allows get a 429 error.
+    """
+    if not DVLA_CLIENT_ID or not DVLA_CLIENT_SECRET:
+        raise HTTPException(status_code=500, detail="DVLA API not configured")
+    
+    semaphore = asyncio.Semaphore(MOT_BATCH_CONCURRENCY)
+    
+    async def fetch(registration: str):
+        async with semaphore:
+            return await fetch_batch_history(registration)
+    
+    # Normalise registrations and fetch each distinct plate once
+    registrations = [normalise_registration(item.registration) for item in batch_request.items]
+    unique = [r for r in dict.fromkeys(registrations) if r is not None]
+    
+    uncached = [r for r in unique if not served_locally(r)]
+    granted = await acquire_lookups(get_client_id(request), len(uncached))
+    over_limit = set(uncached[granted:])
+    if over_limit:
+        RATE_LIMITED.inc()
+    allowed = [r for r in unique if r not in over_limit]
+    
+    fetched = dict(zip(allowed, await asyncio.gather(*(fetch(r) for r in allowed))))
+    for registration in over_limit:
+        fetched[registration] = HTTPException(status_code=429, detail="Rate limit exceeded. Please try again later.")
+    
+    results = [
+        batch_item_result(
+            item,
+            registration,
+            fetched.get(registration),
+            batch_request.include_history
+        )
+        for item, registration in zip(batch_request.items, registrations)
+    ]
+    
+    return ORJSONResponse({
+        "count": len(results),
+        "results": results,
+        "processed_at": datetime.utcnow().isoformat(),
+        "last_updated": "2025-12-16"
+    })
+
+
+@app.post("/api/mot/stream")
+async def stream_lookup(
+    stream_request: StreamRequest,
+    request: Request,
+    format: Optional[str] = None,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream lookups (and optional valuations) for many vehicles
+    Each result is sent as soon as it completes, as NDJSON or Server-Sent Events
+    """
+    if not DVLA_CLIENT_ID or not DVLA_CLIENT_SECRET:
+        raise HTTPException(status_code=500, detail="DVLA API not configured")
+    
+    client_id = get_client_id(request)
+    use_sse = format == "sse" or (
+        format is None and "text/event-stream" in request.headers.get("accept", "")
+    )
+    
+    async def body():
+        count = 0
+        async for index, result in iter_batch_results(
+            stream_request.items,
+            stream_request.include_history,
+            MOT_BATCH_CONCURRENCY,
+            client_id
+        ):
+            count += 1
+            result["index"] = index
+            line = orjson.dumps(result)
+            if use_sse:
+                yield b"event: result\ndata: " + line + b"\n\n"
+            else:
+                yield line + b"\n"
+        if use_sse:
+            yield b"event: done\ndata: " + orjson.dumps({"count": count}) + b"\n\n"
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Stop nginx buffering the stream
+        }
+    )
+
+
+def build_repair_costs_body() -> bytes:
+    """Serialize the (static) repair cost response once, as FastAPI's JSONResponse would"""
+    return json.dumps(
+        {
+            "repair_costs": get_all_repair_costs(),
+            "last_updated": "2025-12-16",
+            "currency": "GBP",
+            "disclaimer": "Prices are estimates and may vary by location and vehicle type"
+        },
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header lists etag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+REPAIR_COSTS_BODY = build_repair_costs_body()
+REPAIR_COSTS_HEADERS = {
+    "ETag": f'"{hashlib.sha256(REPAIR_COSTS_BODY).hexdigest()[:32]}"',
+    "Cache-Control": f"public, max-age={REPAIR_COSTS_MAX_AGE}"
+}
+
+
 @app.get("/api/repair-costs")
-async def get_repair_costs():
+async def get_repair_costs(if_none_match: Optional[str] = Header(None)):
     """
     Get average repair costs for common MOT failures
     """
-    from repair_costs import get_all_repair_costs
-    
-    costs = get_all_repair_costs()
-    return {
-        "repair_costs": costs,
-        "last_updated": "2025-12-16",
-        "currency": "GBP",
-        "disclaimer": "Prices are estimates and may vary by location and vehicle type"
-    }
+    if etag_matches(if_none_match, REPAIR_COSTS_HEADERS["ETag"]):
+        return Response(status_code=304, headers=REPAIR_COSTS_HEADERS)
+    return Response(REPAIR_COSTS_BODY, media_type="application/json", headers=REPAIR_COSTS_HEADERS)
 
 
 if __name__ == "__main__":
@@ -341,5 +1145,5 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=os.getenv("DEV_RELOAD", "false").lower() == "true"
     )
@@ -0,0 +1,245 @@
+"""
+Prometheus metrics without the client library
+Counters and histograms are plain dicts keyed by label values, updated
+inline on the hot path (no locks: each worker runs a single event loop)
+and rendered in the Prometheus text format only when /metrics is scraped.
+Values are per process; with several workers each scrape sees one of them.
+"""
+
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+import os
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+# Per-stage timings inside the valuation engine and repair cost estimate (off: one observation per valuation)
+STAGE_TIMINGS = os.getenv("METRICS_STAGE_TIMINGS", "false").lower() == "true"
+
+# Seconds; from cache hits (well under 1 ms) to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# In-process work such as valuation stages takes microseconds
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """Base for metrics; subclasses yield (name, labels, value) samples"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, labelvalues: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic count, optionally read from a callback at scrape time"""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.function = function
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.values[labelvalues] = self.values.get(labelvalues, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        if self.function is not None:
+            yield self.name + "_total", {}, self.function()
+        for labelvalues, value in self.values.items():
+            yield self.name + "_total", self._labels(labelvalues), value
+
+
+class Gauge(Metric):
+    """Current value, set directly or read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.function = function
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self.values[labelvalues] = value
+
+    def samples(self) -> Iterator[Sample]:
+        if self.function is not None:
+            yield self.name, {}, self.function()
+        for labelvalues, value in self.values.items():
+            yield self.name, self._labels(labelvalues), value
+
+
+class HistogramSeries:
+    """Bucket counts for one set of label values; hot paths can hold one and observe() directly"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Per bucket (not cumulative), then above the last
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        # Buckets are upper bounds (le), so a value equal to a bound belongs to it
+        self.counts[bisect_left(self.buckets, value)] += 1
+
+
+class Histogram(Metric):
+    """Bucketed observations per set of label values"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Tuple[str, ...], HistogramSeries] = {}
+
+    def labels(self, *labelvalues: str) -> HistogramSeries:
+        series = self.series.get(labelvalues)
+        if series is None:
+            series = self.series[labelvalues] = HistogramSeries(self.buckets)
+        return series
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        (self.series.get(labelvalues) or self.labels(*labelvalues)).observe(value)
+
+    def samples(self) -> Iterator[Sample]:
+        for labelvalues, series in self.series.items():
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                yield self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield self.name + "_sum", labels, series.sum
+            yield self.name + "_count", labels, cumulative
+
+
+class Registry:
+    """Set of metrics rendered together"""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any) -> Counter:
+        return self.register(Counter(self.prefix + name, documentation, labelnames, **kwargs))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any) -> Gauge:
+        return self.register(Gauge(self.prefix + name, documentation, labelnames, **kwargs))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs: Any) -> Histogram:
+        return self.register(Histogram(self.prefix + name, documentation, labelnames, **kwargs))
+
+    def render(self) -> bytes:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            # Text format 0.0.4 names a counter's family after its _total sample
+            family = metric.name + "_total" if metric.kind == "counter" else metric.name
+            lines.append(f"# HELP {family} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                    lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return ("\n".join(lines) + "\n").encode()
+
+
+# Metrics shared by every module of the application
+REGISTRY = Registry(prefix="motchecker_")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by method, route and status
+
+    Routes are labelled with their path template (unmatched paths as
+    "unmatched") so label values cannot grow without bound.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+        # (method, id(route), status) -> series, so labels are resolved once per route rather than per
+        # request (routes live as long as the app and are unhashable, so they are keyed by identity)
+        self._series: Dict[Tuple[str, int, int], HistogramSeries] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        # A plain function handing back send()'s awaitable: no extra coroutine per message
+        def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            return send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router records the matched route in the (shared) scope
+            route = scope.get("route")
+            key = (scope["method"], id(route), status[0])
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = self.histogram.labels(
+                    key[0],
+                    getattr(route, "path", "unmatched"),
+                    str(key[2])
+                )
+            series.observe(elapsed)
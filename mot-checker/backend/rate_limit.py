@@ -0,0 +1,103 @@
+"""
+Per-client rate limiting
+Sliding-window counter with constant work per request and bounded memory
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+import math
+import time
+
+
+class SlidingWindowRateLimiter:
+    """
+    Approximate sliding-window limiter (two fixed-window counters per client)
+
+    A client's rate is its count in the current window plus the previous
+    window's count weighted by how much of it still overlaps the sliding
+    window. Each check is O(1); clients idle for two windows carry no state
+    and are evicted, and at most max_keys clients are tracked (least
+    recently seen first out).
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [window number, count in it, count in the window before, last seen]
+        self._clients: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self._next_sweep = 0.0
+        self.allowed = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def allow(self, key: Hashable) -> bool:
+        """Count a request from key; False if it is over the limit"""
+        return self.acquire(key, 1) == 1
+
+    def acquire(self, key: Hashable, cost: int) -> int:
+        """Count up to cost requests from key; returns how many fit under the limit"""
+        now = self.clock()
+        current = int(now // self.window)
+        if now >= self._next_sweep:
+            self._evict_idle(now)
+
+        entry = self._clients.get(key)
+        if entry is None:
+            entry = [current, 0, 0, now]
+            self._clients[key] = entry
+            if len(self._clients) > self.max_keys:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._clients.move_to_end(key)
+            if entry[0] != current:
+                entry[2] = entry[1] if entry[0] == current - 1 else 0
+                entry[1] = 0
+                entry[0] = current
+            entry[3] = now
+
+        overlap = 1.0 - (now - current * self.window) / self.window
+        granted = min(cost, max(math.ceil(self.limit - (entry[1] + entry[2] * overlap)), 0))
+        entry[1] += granted
+        self.allowed += granted
+        self.rejected += cost - granted
+        return granted
+
+    def _evict_idle(self, now: float) -> None:
+        # Entries are kept in last-seen order, so idle clients are at the front
+        idle_before = now - 2 * self.window
+        clients = self._clients
+        while clients:
+            key, entry = clients.popitem(last=False)
+            if entry[3] >= idle_before:
+                clients[key] = entry
+                clients.move_to_end(key, last=False)
+                break
+            self.evictions += 1
+        else:
+            # Start afresh so the emptied table's memory is released
+            self._clients = OrderedDict()
+        self._next_sweep = now + self.window / 4
+
+    def reset(self) -> None:
+        self._clients.clear()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self._clients),
+            "max_clients": self.max_keys,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evictions": self.evictions
+        }
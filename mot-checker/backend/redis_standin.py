@@ -0,0 +1,203 @@
+"""
+Local stand-in for Redis
+Speaks enough of the Redis protocol for RedisBackend (GET, SET with
+PX/EX/NX, DEL, INCR, INCRBY, PEXPIRE/EXPIRE, PING, SELECT, AUTH, FLUSHDB,
+DBSIZE, and EVAL/EVALSHA of the rate-limit script only, run natively), so
+multi-worker setups can be tried without a Redis server. Not for
+production: single process, no persistence.
+
+Usage:
+    python redis_standin.py [--host 127.0.0.1] [--port 6379]
+    STATE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6379/0 ...
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import math
+import time
+
+from shared_state import RATE_LIMIT_SCRIPT, RATE_LIMIT_SCRIPT_SHA, read_reply
+
+
+def encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, Exception):
+        return b"-ERR %s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class StandinStore:
+    """Key/value store with per-key expiry, implementing the supported commands"""
+
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.commands = 0
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def sweep(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self.data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self.data[key]
+
+    def execute(self, args: List[bytes]) -> Any:
+        self.commands += 1
+        if not args:
+            return ValueError("empty command")
+        name = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            return ValueError(f"unknown command '{name}'")
+        try:
+            return handler(*args[1:])
+        except (TypeError, ValueError) as e:
+            return ValueError(f"wrong arguments for '{name}': {e}")
+
+    def cmd_ping(self, message: bytes = None):
+        return "PONG" if message is None else message
+
+    def cmd_auth(self, *args):
+        return "OK"
+
+    def cmd_select(self, db: bytes):
+        return "OK"
+
+    def cmd_get(self, key: bytes):
+        entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    def cmd_set(self, key: bytes, value: bytes, *options: bytes):
+        expires_at = None
+        only_if_absent = False
+        options = [option.upper() for option in options]
+        index = 0
+        while index < len(options):
+            option = options[index]
+            if option == b"NX":
+                only_if_absent = True
+            elif option in (b"PX", b"EX"):
+                amount = int(options[index + 1])
+                expires_at = time.monotonic() + (amount / 1000 if option == b"PX" else amount)
+                index += 1
+            else:
+                raise ValueError(f"unsupported option {option.decode()}")
+            index += 1
+
+        if only_if_absent and self._live(key) is not None:
+            return None
+        self.data[key] = (value, expires_at)
+        return "OK"
+
+    def cmd_del(self, *keys: bytes):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def cmd_incr(self, key: bytes):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_incrby(self, key: bytes, increment: bytes):
+        entry = self._live(key)
+        value, expires_at = entry if entry is not None else (b"0", None)
+        value = int(value) + int(increment)
+        self.data[key] = (str(value).encode(), expires_at)
+        return value
+
+    def cmd_pexpire(self, key: bytes, milliseconds: bytes):
+        entry = self._live(key)
+        if entry is None:
+            return 0
+        self.data[key] = (entry[0], time.monotonic() + int(milliseconds) / 1000)
+        return 1
+
+    def cmd_expire(self, key: bytes, seconds: bytes):
+        return self.cmd_pexpire(key, str(int(seconds) * 1000).encode())
+
+    def cmd_eval(self, script: bytes, *args: bytes):
+        if script.decode() != RATE_LIMIT_SCRIPT:
+            raise ValueError("only the rate-limit script is supported")
+        return self._rate_limit_script(*args)
+
+    def cmd_evalsha(self, sha: bytes, *args: bytes):
+        if sha.decode() != RATE_LIMIT_SCRIPT_SHA:
+            raise ValueError("only the rate-limit script is supported")
+        return self._rate_limit_script(*args)
+
+    def _rate_limit_script(self, key_count: bytes, *args: bytes):
+        """RATE_LIMIT_SCRIPT, in Python"""
+        keys, argv = args[:int(key_count)], args[int(key_count):]
+        limit, overlap, cost, expiry = int(argv[0]), float(argv[1]), int(argv[2]), argv[3]
+        used = int(self.cmd_get(keys[0]) or 0) + int(self.cmd_get(keys[1]) or 0) * overlap
+        granted = min(cost, max(math.ceil(limit - used), 0))
+        if granted > 0:
+            self.cmd_incrby(keys[0], str(granted).encode())
+            self.cmd_pexpire(keys[0], expiry)
+        if len(keys) > 2:
+            value = self.cmd_get(keys[2])
+            return [granted] if value is None else [granted, value]
+        return [granted]
+
+    def cmd_flushdb(self):
+        self.data.clear()
+        return "OK"
+
+    def cmd_dbsize(self):
+        return len(self.data)
+
+
+async def serve(host: str, port: int) -> None:
+    store = StandinStore()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_reply(reader)
+                writer.write(encode_reply(store.execute(args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def sweep_expired():
+        while True:
+            await asyncio.sleep(1)
+            store.sweep()
+
+    server = await asyncio.start_server(handle, host, port)
+    sweeper = asyncio.create_task(sweep_expired())
+    print(f"Redis stand-in listening on {host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Redis stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
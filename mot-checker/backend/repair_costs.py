@@ -4,8 +4,12 @@ Prices are average estimates in GBP based on UK market data
 Last updated: 2025-12-16
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+from functools import lru_cache
 import re
+import time
+
+from metrics import FAST_BUCKETS, REGISTRY, STAGE_TIMINGS
 
 # Comprehensive repair cost database
 REPAIR_COSTS = {
@@ -217,6 +221,112 @@ REPAIR_COSTS = {
 }
 
 
+class RepairEstimate(NamedTuple):
+    """Immutable cost estimate for a repair category"""
+    category: str
+    min_cost: int
+    max_cost: int
+    average_cost: int
+    description: str
+
+
+# Default estimate for unknown issues
+UNKNOWN_ESTIMATE = RepairEstimate(
+    category="unknown",
+    min_cost=50,
+    max_cost=500,
+    average_cost=200,
+    description="General repair"
+)
+
+# Distinct defect texts remembered by classify_repair()
+CLASSIFICATION_CACHE_SIZE = 4096
+
+
+def _compile_category_matchers() -> List[Tuple[RepairEstimate, Pattern]]:
+    """Compile each category's patterns into one alternation, in REPAIR_COSTS order"""
+    return [
+        (
+            RepairEstimate(
+                category=category,
+                min_cost=data["min_cost"],
+                max_cost=data["max_cost"],
+                average_cost=data["average_cost"],
+                description=data["description"]
+            ),
+            re.compile("|".join(f"(?:{pattern})" for pattern in data["patterns"]))
+        )
+        for category, data in REPAIR_COSTS.items()
+    ]
+
+
+# Compiled once at import; the first category that matches wins, as before
+CATEGORY_MATCHERS = _compile_category_matchers()
+
+
+def _classify_normalized(failure_lower: str) -> RepairEstimate:
+    for estimate, matcher in CATEGORY_MATCHERS:
+        if matcher.search(failure_lower):
+            return estimate
+    return UNKNOWN_ESTIMATE
+
+
+_classify_cached = lru_cache(maxsize=CLASSIFICATION_CACHE_SIZE)(_classify_normalized)
+
+REPAIR_COST_STAGE_SECONDS = REGISTRY.histogram(
+    "repair_cost_stage_seconds",
+    "Time spent in each stage of calculate_total_repair_costs (METRICS_STAGE_TIMINGS only)",
+    ["stage"],
+    buckets=FAST_BUCKETS
+)
+CLASSIFY_SECONDS = REPAIR_COST_STAGE_SECONDS.labels("classify")
+AGGREGATE_SECONDS = REPAIR_COST_STAGE_SECONDS.labels("aggregate")
+REGISTRY.counter(
+    "repair_classification_hits",
+    "Defect classifications served from the memo cache",
+    function=lambda: _classify_cached.cache_info().hits
+)
+REGISTRY.counter(
+    "repair_classification_misses",
+    "Defect classifications that ran the category patterns",
+    function=lambda: _classify_cached.cache_info().misses
+)
+
+
+def classify_repair(failure_text: str) -> RepairEstimate:
+    """
+    Classify a failure description into a repair category
+    
+    MOT defect texts come from a fixed manual vocabulary, so results are
+    memoized on the normalized text.
+    
+    Args:
+        failure_text: The MOT failure/advisory text
+        
+    Returns:
+        Shared, immutable estimate for the matching category
+    """
+    return _classify_cached(failure_text.lower().strip())
+
+
+def classification_cache_info() -> Dict[str, any]:
+    """
+    Get memoization statistics for classify_repair()
+    
+    Returns:
+        Dictionary of hit/miss counters and cache size
+    """
+    info = _classify_cached.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0
+    }
+
+
 def estimate_repair_cost(failure_text: str) -> Dict[str, any]:
     """
     Estimate repair cost based on failure description
@@ -227,27 +337,13 @@ def estimate_repair_cost(failure_text: str) -> Dict[str, any]:
     Returns:
         Dictionary containing cost estimate
     """
-    failure_lower = failure_text.lower()
-    
-    for category, data in REPAIR_COSTS.items():
-        for pattern in data["patterns"]:
-            if re.search(pattern, failure_lower):
-                return {
-                    "category": category,
-                    "min_cost": data["min_cost"],
-                    "max_cost": data["max_cost"],
-                    "average_cost": data["average_cost"],
-                    "description": data["description"],
-                    "matched_text": failure_text
-                }
-    
-    # Default estimate for unknown issues
+    estimate = classify_repair(failure_text)
     return {
-        "category": "unknown",
-        "min_cost": 50,
-        "max_cost": 500,
-        "average_cost": 200,
-        "description": "General repair",
+        "category": estimate.category,
+        "min_cost": estimate.min_cost,
+        "max_cost": estimate.max_cost,
+        "average_cost": estimate.average_cost,
+        "description": estimate.description,
         "matched_text": failure_text
     }
 
@@ -262,18 +358,22 @@ def calculate_total_repair_costs(failures: List[Dict]) -> Dict[str, any]:
     Returns:
         Dictionary with cost breakdown
     """
+    if STAGE_TIMINGS:
+        started = time.perf_counter()
+    estimates = [estimate_repair_cost(failure.get("text", "")) for failure in failures]
+    if STAGE_TIMINGS:
+        classified = time.perf_counter()
+    
     total_min = 0
     total_max = 0
     total_average = 0
     breakdown = []
     dangerous_items = []
     
-    for failure in failures:
+    for failure, estimate in zip(failures, estimates):
         failure_text = failure.get("text", "")
         is_dangerous = failure.get("dangerous", False)
         
-        estimate = estimate_repair_cost(failure_text)
-        
         total_min += estimate["min_cost"]
         total_max += estimate["max_cost"]
         total_average += estimate["average_cost"]
@@ -287,7 +387,7 @@ def calculate_total_repair_costs(failures: List[Dict]) -> Dict[str, any]:
         if is_dangerous:
             dangerous_items.append(failure_text)
     
-    return {
+    result = {
         "total_min_cost": round(total_min, 2),
         "total_max_cost": round(total_max, 2),
         "total_average_cost": round(total_average, 2),
@@ -298,6 +398,11 @@ def calculate_total_repair_costs(failures: List[Dict]) -> Dict[str, any]:
         "disclaimer": "Estimates may vary by location, vehicle type, and parts availability. This is for guidance only.",
         "last_updated": "2025-12-16"
     }
+    
+    if STAGE_TIMINGS:
+        CLASSIFY_SECONDS.observe(classified - started)
+        AGGREGATE_SECONDS.observe(time.perf_counter() - classified)
+    return result
 
 
 def get_all_repair_costs() -> Dict[str, any]:
@@ -339,13 +444,13 @@ def get_repair_history_summary(mot_tests: List[Dict]) -> Dict[str, any]:
             failure_text = item.get("text", "")
             item_type = item.get("type", "")
             
-            estimate = estimate_repair_cost(failure_text)
-            category = estimate["category"]
+            estimate = classify_repair(failure_text)
+            category = estimate.category
             
             if category not in issue_frequency:
                 issue_frequency[category] = {
                     "count": 0,
-                    "description": estimate["description"],
+                    "description": estimate.description,
                     "examples": []
                 }
             
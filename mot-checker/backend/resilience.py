@@ -0,0 +1,291 @@
+"""
+Resilience for upstream calls
+Bounded retries with exponential backoff and full jitter, optional hedged
+requests once an attempt is slower than the recent p95, and a circuit
+breaker that fails fast while the upstream is down. Only for idempotent
+requests: an attempt may be sent more than once.
+
+Every attempt is given what is left of the request's deadline, and is
+cancelled when that runs out, so retries never make a request take longer
+than the deadline in total.
+
+The breaker counts logical requests, not attempts: a request that still
+fails once its retries run out is one failure. A 429 is back-pressure from
+a working upstream, so it is retried but never counted as a failure.
+"""
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import random
+import time
+
+import httpx
+
+# Statuses worth retrying; all but 429 count against the circuit breaker
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+THROTTLED_STATUS = 429
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Upstream circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    Opens after failure_threshold failures in a row and rejects calls for
+    recovery_time seconds, then lets a single trial call through (half-open):
+    success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """True if a call may go ahead now"""
+        if self.state == self.CLOSED:
+            return True
+
+        now = self.clock()
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.recovery_time:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_started = None
+
+        # Half-open: one trial at a time (a trial that never reports back is abandoned after recovery_time)
+        if self._trial_started is not None and now - self._trial_started < self.recovery_time:
+            self.rejected += 1
+            return False
+        self._trial_started = now
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next call may be let through"""
+        if self.state == self.CLOSED:
+            return 0.0
+        if self.state == self.OPEN:
+            return max(self._opened_at + self.recovery_time - self.clock(), 0.0)
+        return max((self._trial_started or 0.0) + self.recovery_time - self.clock(), 0.0)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._trial_started = None
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_started = None
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self._opened_at = self.clock()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+class ResilientUpstream:
+    """Retries, hedging and circuit breaking around idempotent upstream requests"""
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        deadline: float = 10.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay: float = 0.05,
+        hedge_budget: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None,
+        random_fraction: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline  # Longest a request may take, retries included
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_budget = hedge_budget  # Most hedges as a fraction of requests
+        self.breaker = breaker or CircuitBreaker()
+        self.random_fraction = random_fraction
+        self.clock = clock
+
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self._hedge_delay: Optional[float] = None
+        self._samples_since_update = 0
+
+        self.requests = 0
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    async def request(self, send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Send a request with retries (and a hedge, if enabled)
+
+        send(budget) makes one attempt and should time out within budget
+        seconds (the time left before the deadline); an attempt still
+        running then is cancelled and treated as an httpx.TimeoutException.
+
+        Returns the first response that is not retryable, or the last one
+        once retries run out. Raises CircuitOpenError without calling send()
+        while the breaker is open, and re-raises the last transport error.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.retry_after())
+
+        self.requests += 1
+        give_up_at = self.clock() + self.deadline
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await (
+                    self._send_hedged(send, give_up_at) if self.hedge else self._send(send, give_up_at)
+                )
+            except httpx.TransportError:
+                backoff = self._backoff(attempt, None)
+                if not self._may_retry(attempt, give_up_at, backoff):
+                    self.breaker.record_failure()
+                    raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                backoff = self._backoff(attempt, response)
+                if not self._may_retry(attempt, give_up_at, backoff):
+                    if response.status_code == THROTTLED_STATUS:
+                        # Throttled, not down: the upstream answered
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                    return response
+
+            await asyncio.sleep(backoff)
+            attempt += 1
+            self.retried += 1
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        # Full jitter: anywhere between no wait and the exponential backoff
+        backoff = self.random_fraction() * min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if response is not None:
+            backoff = max(backoff, _retry_after(response))
+        return backoff
+
+    def _may_retry(self, attempt: int, give_up_at: float, backoff: float) -> bool:
+        # The retry must start with some of the deadline left; a Retry-After beyond backoff_max is not waited out
+        return (
+            attempt < self.retries
+            and self.clock() + backoff < give_up_at
+            and backoff <= self.backoff_max
+            and self.breaker.allow()
+        )
+
+    async def _send(self, send: Callable[[float], Awaitable[httpx.Response]], give_up_at: float) -> httpx.Response:
+        started = self.clock()
+        budget = give_up_at - started
+        try:
+            # The budget bounds the whole attempt, not each phase of it
+            response = await asyncio.wait_for(send(budget), max(budget, 0.0))
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException(f"Attempt ran past the deadline ({budget:.2f}s left)")
+        self._record_latency(self.clock() - started)
+        return response
+
+    async def _send_hedged(
+        self,
+        send: Callable[[float], Awaitable[httpx.Response]],
+        give_up_at: float
+    ) -> httpx.Response:
+        """Send once; if that is slower than the recent p95, send again and take whichever finishes first"""
+        first = asyncio.ensure_future(self._send(send, give_up_at))
+        tasks = [first]
+        try:
+            delay = self._hedge_delay
+            if delay is None or self.hedged >= self.hedge_budget * self.requests:
+                return await first
+
+            done, _ = await asyncio.wait(tasks, timeout=max(delay, self.hedge_min_delay))
+            if not done:
+                self.hedged += 1
+                tasks.append(asyncio.ensure_future(self._send(send, give_up_at)))
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                if not any(task.exception() is None for task in done):
+                    # The first to finish failed; wait for the other
+                    done, _ = await asyncio.wait(tasks)
+
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    if task is not first:
+                        self.hedge_wins += 1
+                    return task.result()
+            # Every attempt failed: report the original attempt's error
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._samples_since_update += 1
+        # Re-sorting every sample would cost more than the hedge saves
+        if self._samples_since_update >= 16 and len(self._latencies) >= 20:
+            self._samples_since_update = 0
+            ordered = sorted(self._latencies)
+            self._hedge_delay = ordered[int(self.hedge_quantile * (len(ordered) - 1))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retried,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay": round(self._hedge_delay, 4) if self.hedge and self._hedge_delay is not None else None,
+            "circuit": self.breaker.stats()
+        }
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Seconds from a Retry-After header (delay form only), or 0"""
+    try:
+        return max(float(response.headers.get("retry-after", 0)), 0.0)
+    except ValueError:
+        return 0.0
@@ -0,0 +1,392 @@
+"""
+Shared state for rate limits, tokens and cached responses
+MemoryBackend keeps state in-process (one worker); RedisBackend keeps it in
+Redis (or anything speaking its protocol, e.g. redis_standin.py) so every
+worker and replica sees the same limits, token and cache.
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+import asyncio
+import hashlib
+import time
+
+from cache import TTLCache
+from rate_limit import SlidingWindowRateLimiter
+
+
+class StateError(Exception):
+    """Raised when the shared state store cannot be reached or rejects a command"""
+
+
+# Sliding-window check for RedisBackend, run atomically in Redis: the request is
+# counted only if it is under the limit, as SlidingWindowRateLimiter does.
+# KEYS: this window's counter, the last window's counter, [a key to GET as well]
+# ARGV: limit, overlap of the last window, cost, counter expiry (ms)
+# Returns {units granted (0..cost), [value of the extra key]}
+RATE_LIMIT_SCRIPT = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0') + tonumber(redis.call('GET', KEYS[2]) or '0') * tonumber(ARGV[2])
+local granted = math.min(tonumber(ARGV[3]), math.max(math.ceil(tonumber(ARGV[1]) - used), 0))
+if granted > 0 then
+    redis.call('INCRBY', KEYS[1], granted)
+    redis.call('PEXPIRE', KEYS[1], ARGV[4])
+end
+if KEYS[3] then
+    return {granted, redis.call('GET', KEYS[3])}
+end
+return {granted}
+"""
+RATE_LIMIT_SCRIPT_SHA = hashlib.sha1(RATE_LIMIT_SCRIPT.encode()).hexdigest()
+
+
+class StateBackend:
+    """Key/value and rate-limit operations, each costing at most one round trip"""
+
+    # True when state is visible to other processes (worth caching responses in)
+    shared = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set key only if it does not exist; True if this call set it"""
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def allow(self, key: str, limit: int, window: float) -> bool:
+        """Count a request against key's sliding-window limit; False if over it"""
+        raise NotImplementedError
+
+    async def allow_and_get(self, key: str, limit: int, window: float, get_key: str) -> Tuple[bool, Optional[bytes]]:
+        """allow() and get(get_key) together, in a single round trip"""
+        raise NotImplementedError
+
+    async def acquire(self, key: str, limit: int, window: float, cost: int) -> int:
+        """Count up to cost requests against key's limit; returns how many fit"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(StateBackend):
+    """Process-local state, for a single worker"""
+
+    def __init__(self, max_entries: int = 10000, max_rate_limit_keys: int = 100000):
+        self.values = TTLCache(max_entries=max_entries)
+        self.max_rate_limit_keys = max_rate_limit_keys
+        self.limiters: Dict[Tuple[int, float], SlidingWindowRateLimiter] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.values.set(key, value, ttl=ttl)
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        if key in self.values:
+            return False
+        self.values.set(key, value, ttl=ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self.values.pop(key)
+
+    async def allow(self, key: str, limit: int, window: float) -> bool:
+        return self._limiter(limit, window).allow(key)
+
+    async def acquire(self, key: str, limit: int, window: float, cost: int) -> int:
+        return self._limiter(limit, window).acquire(key, cost)
+
+    def _limiter(self, limit: int, window: float) -> SlidingWindowRateLimiter:
+        limiter = self.limiters.get((limit, window))
+        if limiter is None:
+            limiter = SlidingWindowRateLimiter(limit, window, max_keys=self.max_rate_limit_keys)
+            self.limiters[(limit, window)] = limiter
+        return limiter
+
+    async def allow_and_get(self, key: str, limit: int, window: float, get_key: str) -> Tuple[bool, Optional[bytes]]:
+        return await self.allow(key, limit, window), self.values.get(get_key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "values": self.values.stats(),
+            "rate_limits": [limiter.stats() for limiter in self.limiters.values()]
+        }
+
+
+class RedisBackend(StateBackend):
+    """State kept in Redis, shared by all workers and replicas"""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "motchecker:", timeout: float = 1.0):
+        self.client = RESPClient.from_url(url, timeout=timeout)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.execute("GET", self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.execute("SET", self.prefix + key, value, "PX", max(int(ttl * 1000), 1))
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        reply = await self.client.execute("SET", self.prefix + key, value, "PX", max(int(ttl * 1000), 1), "NX")
+        return reply == "OK"
+
+    async def delete(self, key: str) -> None:
+        await self.client.execute("DEL", self.prefix + key)
+
+    async def allow(self, key: str, limit: int, window: float) -> bool:
+        granted, _ = await self._rate_limit(key, limit, window, 1)
+        return granted == 1
+
+    async def allow_and_get(self, key: str, limit: int, window: float, get_key: str) -> Tuple[bool, Optional[bytes]]:
+        granted, value = await self._rate_limit(key, limit, window, 1, get_key)
+        return granted == 1, value
+
+    async def acquire(self, key: str, limit: int, window: float, cost: int) -> int:
+        granted, _ = await self._rate_limit(key, limit, window, cost)
+        return granted
+
+    async def _rate_limit(
+        self,
+        key: str,
+        limit: int,
+        window: float,
+        cost: int,
+        get_key: Optional[str] = None
+    ) -> Tuple[int, Optional[bytes]]:
+        """Run RATE_LIMIT_SCRIPT: fixed-window counters for this window and the last"""
+        now = time.time()
+        current = int(now // window)
+        keys = [f"{self.prefix}rl:{key}:{current}", f"{self.prefix}rl:{key}:{current - 1}"]
+        if get_key is not None:
+            keys.append(self.prefix + get_key)
+        overlap = 1.0 - (now - current * window) / window
+        args = [limit, repr(overlap), cost, int(window * 2000)]
+        try:
+            reply = await self.client.execute("EVALSHA", RATE_LIMIT_SCRIPT_SHA, len(keys), *keys, *args)
+        except StateError as e:
+            if "NOSCRIPT" not in str(e):
+                raise
+            # First use since the server started (or its script cache was flushed)
+            reply = await self.client.execute("EVAL", RATE_LIMIT_SCRIPT, len(keys), *keys, *args)
+        return reply[0], reply[1] if len(reply) > 1 else None
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", **self.client.stats()}
+
+
+def create_state_backend(
+    backend: str,
+    redis_url: str = "",
+    max_entries: int = 10000,
+    max_rate_limit_keys: int = 100000
+) -> StateBackend:
+    """Build the backend named by configuration ("memory" or "redis")"""
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL is required for the redis state backend")
+        return RedisBackend(redis_url)
+    if backend == "memory":
+        return MemoryBackend(max_entries=max_entries, max_rate_limit_keys=max_rate_limit_keys)
+    raise ValueError(f"Unknown state backend: {backend}")
+
+
+class ReplyError(Exception):
+    """Error reply (-ERR ...) from the server"""
+
+
+def encode_command(args: Sequence[Any]) -> bytes:
+    """Encode one command as a RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, (bytes, bytearray)):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Read one RESP value; error replies are returned as ReplyError instances"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return ReplyError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected reply: {line!r}")
+
+
+class RESPClient:
+    """
+    Minimal asyncio Redis client with pipelining
+
+    Commands from all callers share one connection: each is written as soon
+    as it is issued and replies are matched to callers in order, so
+    concurrent requests never wait for each other's round trips.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        timeout: float = 1.0
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._connect_lock = asyncio.Lock()
+
+        self.commands = 0
+        self.round_trips = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 1.0) -> "RESPClient":
+        """Build a client from redis://[:password@]host[:port][/db]"""
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported state store URL: {url}")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(parsed.path.lstrip("/") or 0),
+            password=unquote(parsed.password) if parsed.password else None,
+            timeout=timeout
+        )
+
+    async def execute(self, *args: Any) -> Any:
+        """Send one command and return its reply"""
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: List[Sequence[Any]]) -> List[Any]:
+        """Send several commands in one write and return their replies in order"""
+        if self._writer is None:
+            await self._connect()
+
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        self._pending.extend(futures)
+        self._writer.write(b"".join(encode_command(command) for command in commands))
+        self.commands += len(commands)
+        self.round_trips += 1
+
+        try:
+            replies = await asyncio.wait_for(
+                asyncio.gather(*futures, return_exceptions=True),
+                self.timeout
+            )
+        except asyncio.TimeoutError:
+            # Replies may still arrive and would be matched to the wrong callers
+            self.errors += 1
+            self._disconnect(StateError("Timed out waiting for the state store"))
+            raise StateError("Timed out waiting for the state store")
+
+        for reply in replies:
+            if isinstance(reply, StateError):
+                raise reply
+            if isinstance(reply, ReplyError):
+                self.errors += 1
+                raise StateError(str(reply))
+        return replies
+
+    async def _connect(self) -> None:
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    self.timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                self.errors += 1
+                raise StateError(f"Cannot connect to state store: {e}") from e
+            self._reader_task = asyncio.create_task(self._read_replies(self._reader))
+
+            setup = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", self.db))
+            if setup:
+                await self.pipeline(setup)
+
+    async def _read_replies(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                reply = await read_reply(reader)
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, IndexError) as e:
+            self.errors += 1
+            self._disconnect(StateError(f"State store connection lost: {e}"))
+
+    def _disconnect(self, error: Exception) -> None:
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        self._reader = self._writer = self._reader_task = None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            writer = self._writer
+            self._disconnect(StateError("Client closed"))
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._writer is not None,
+            "commands": self.commands,
+            "round_trips": self.round_trips,
+            "errors": self.errors
+        }
@@ -0,0 +1,56 @@
+"""
+Request coalescing
+Concurrent callers asking for the same key share a single in-flight call
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+
+
+class SingleFlight:
+    """Deduplicate concurrent async calls that share a key"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or join the call already running for it
+
+        Every caller receives the same result, or the same exception.
+        The call runs as its own task, so one caller being cancelled
+        does not cancel it for the others.
+        """
+        future = self._in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring"""
+        return {
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "shared": self.shared
+        }
@@ -0,0 +1,256 @@
+"""
+OAuth2 token manager for the DVLA API
+Serializes token refreshes and renews the token in the background before it expires.
+With a shared state backend, workers share one token instead of each fetching its own.
+"""
+
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import json
+import time
+
+import httpx
+
+from metrics import REGISTRY
+from shared_state import StateBackend, StateError
+
+TOKEN_REFRESHES = REGISTRY.counter(
+    "token_refreshes",
+    "Access token refreshes by result (fetched, shared from another worker, failed)",
+    ["result"]
+)
+TOKEN_REFRESH_SECONDS = REGISTRY.histogram(
+    "token_refresh_seconds",
+    "Duration of requests to the OAuth2 token endpoint"
+)
+
+
+class TokenError(Exception):
+    """Raised when an access token cannot be obtained"""
+
+
+class TokenManager:
+    """Client-credentials token cache with single-flight, proactive refresh"""
+
+    def __init__(
+        self,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        scope: str,
+        get_client: Callable[[], httpx.AsyncClient],
+        expiry_margin: float = 300,
+        refresh_ahead: float = 120,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        state: Optional[StateBackend] = None,
+        state_key: str = "dvla:token",
+        shared_wait: float = 0.5
+    ):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.get_client = get_client
+        self.expiry_margin = expiry_margin  # Treat tokens as expired this early
+        self.refresh_ahead = refresh_ahead  # Background refresh this long before that
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.state = state
+        self.state_key = state_key
+        self.shared_wait = shared_wait  # How long to wait for another worker's refresh
+
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0  # time.monotonic() deadline
+        self._refresh_task: Optional[asyncio.Future] = None
+        self._background_task: Optional[asyncio.Task] = None
+        self._consecutive_failures = 0
+        self._retry_at = 0.0
+        self._last_error: Optional[str] = None
+
+        self.refresh_count = 0
+        self.shared_count = 0
+        self.failure_count = 0
+        self.last_refresh_duration: Optional[float] = None
+
+    @property
+    def has_valid_token(self) -> bool:
+        return self._access_token is not None and time.monotonic() < self._expires_at
+
+    async def get_token(self) -> str:
+        """Return a valid access token, waiting on a refresh only if none is cached"""
+        if self.has_valid_token:
+            return self._access_token
+        return await self.refresh()
+
+    async def refresh(self) -> str:
+        """Fetch a new token, joining any refresh that is already in flight"""
+        if self._refresh_task is None:
+            if self._last_error and time.monotonic() < self._retry_at:
+                raise TokenError(f"Token endpoint backing off after error: {self._last_error}")
+            self._refresh_task = asyncio.ensure_future(self._fetch_token())
+            self._refresh_task.add_done_callback(self._refresh_done)
+        return await asyncio.shield(self._refresh_task)
+
+    def _refresh_done(self, task: asyncio.Future) -> None:
+        self._refresh_task = None
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved; callers re-raise it themselves
+
+    async def _fetch_token(self) -> str:
+        shared = await self._load_shared_token()
+        if shared is not None:
+            TOKEN_REFRESHES.inc("shared")
+            return shared
+
+        claimed = await self._claim_refresh()
+        if not claimed:
+            # Another worker is fetching; use its token if it lands in time
+            await asyncio.sleep(self.shared_wait)
+            shared = await self._load_shared_token()
+            if shared is not None:
+                TOKEN_REFRESHES.inc("shared")
+                return shared
+
+        started = time.perf_counter()
+        try:
+            response = await self.get_client().post(
+                self.token_url,
+                data={
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "scope": self.scope,
+                    "grant_type": "client_credentials"
+                },
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded"
+                }
+            )
+            response.raise_for_status()
+            token_data = response.json()
+            access_token = token_data["access_token"]
+            expires_in = float(token_data.get("expires_in", 3600))
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            if claimed:
+                await self._release_refresh()
+            self.failure_count += 1
+            self._consecutive_failures += 1
+            backoff = min(
+                self.max_backoff,
+                self.min_backoff * 2 ** (self._consecutive_failures - 1)
+            )
+            self._retry_at = time.monotonic() + backoff
+            self._last_error = str(e) or type(e).__name__
+            TOKEN_REFRESHES.inc("failed")
+            raise TokenError(self._last_error) from e
+        finally:
+            self.last_refresh_duration = time.perf_counter() - started
+            TOKEN_REFRESH_SECONDS.observe(self.last_refresh_duration)
+
+        self._use_token(access_token, expires_in)
+        self.refresh_count += 1
+        TOKEN_REFRESHES.inc("fetched")
+        await self._store_shared_token(access_token, expires_in)
+        if claimed:
+            await self._release_refresh()
+        return access_token
+
+    def _use_token(self, access_token: str, expires_in: float) -> None:
+        self._access_token = access_token
+        self._expires_at = time.monotonic() + max(expires_in - self.expiry_margin, 0)
+        self._consecutive_failures = 0
+        self._last_error = None
+
+    async def _load_shared_token(self) -> Optional[str]:
+        """Adopt a token another worker stored, if it will not need refreshing straight away"""
+        if self.state is None:
+            return None
+        try:
+            stored = await self.state.get(self.state_key)
+        except StateError:
+            return None
+        if not stored:
+            return None
+
+        try:
+            token = json.loads(stored)
+            access_token = token["access_token"]
+            # Stored with a wall-clock expiry: monotonic clocks differ between processes
+            expires_in = float(token["expires_at"]) - time.time()
+        except (ValueError, KeyError, TypeError):
+            return None  # Unreadable entry: fetch a new token, which overwrites it
+        if not isinstance(access_token, str) or expires_in - self.expiry_margin <= self.refresh_ahead:
+            return None
+        self._use_token(access_token, expires_in)
+        self.shared_count += 1
+        return access_token
+
+    async def _store_shared_token(self, access_token: str, expires_in: float) -> None:
+        if self.state is None:
+            return
+        stored = json.dumps({"access_token": access_token, "expires_at": time.time() + expires_in})
+        try:
+            await self.state.set(self.state_key, stored.encode(), ttl=expires_in)
+        except StateError:
+            pass
+
+    async def _claim_refresh(self) -> bool:
+        """Take the cross-worker refresh lock; True if this worker should fetch"""
+        if self.state is None:
+            return True
+        try:
+            return await self.state.set_if_absent(f"{self.state_key}:lock", b"1", ttl=30)
+        except StateError:
+            return True
+
+    async def _release_refresh(self) -> None:
+        if self.state is None:
+            return
+        try:
+            await self.state.delete(f"{self.state_key}:lock")
+        except StateError:
+            pass
+
+    def _next_refresh_delay(self) -> float:
+        now = time.monotonic()
+        if self._access_token is None:
+            delay = 0.0
+        else:
+            delay = max(self._expires_at - self.refresh_ahead - now, self.min_backoff)
+        if self._consecutive_failures:
+            delay = max(delay, self._retry_at - now)
+        return delay
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_refresh_delay())
+            try:
+                await self.refresh()
+            except TokenError:
+                pass  # Backoff is recorded; the next iteration waits it out
+
+    def start(self) -> None:
+        """Start refreshing the token in the background"""
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task"""
+        if self._background_task is not None:
+            self._background_task.cancel()
+            try:
+                await self._background_task
+            except asyncio.CancelledError:
+                pass
+            self._background_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Refresh counters for monitoring"""
+        return {
+            "has_valid_token": self.has_valid_token,
+            "refreshes": self.refresh_count,
+            "shared": self.shared_count,
+            "failures": self.failure_count,
+            "last_refresh_duration": self.last_refresh_duration,
+            "last_error": self._last_error
+        }
@@ -3,23 +3,66 @@ Vehicle valuation engine
 Calculates whether a vehicle is worth buying based on MOT history
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, NamedTuple
 from datetime import datetime, timedelta
+import time
+
+from metrics import FAST_BUCKETS, REGISTRY, STAGE_TIMINGS
 from repair_costs import calculate_total_repair_costs, get_repair_history_summary
 
+FAILURE_TYPES = ("FAIL", "MAJOR", "DANGEROUS")
+MAJOR_TYPES = ("MAJOR", "FAIL")
+ADVISORY_TYPES = ("ADVISORY", "MINOR")
+REPAIR_TYPES = ("FAIL", "MAJOR", "DANGEROUS", "ADVISORY", "MINOR")
+
+VALUATION_SECONDS = REGISTRY.histogram(
+    "valuation_seconds",
+    "Time spent in ValuationEngine.calculate_valuation",
+    buckets=FAST_BUCKETS
+).labels()
+VALUATION_STAGE_SECONDS = REGISTRY.histogram(
+    "valuation_stage_seconds",
+    "Time spent in each stage of ValuationEngine.calculate_valuation (METRICS_STAGE_TIMINGS only)",
+    ["stage"],
+    buckets=FAST_BUCKETS
+)
+SUMMARISE_SECONDS = VALUATION_STAGE_SECONDS.labels("summarise")
+SCORE_SECONDS = VALUATION_STAGE_SECONDS.labels("score")
+REPAIRS_SECONDS = VALUATION_STAGE_SECONDS.labels("repairs")
+RECOMMEND_SECONDS = VALUATION_STAGE_SECONDS.labels("recommend")
+
+
+class VehicleSummary(NamedTuple):
+    """Per-vehicle features extracted from the MOT history in a single pass"""
+    test_count: int
+    passes: int
+    recent_failure_defects: int  # FAIL/MAJOR/DANGEROUS items in the last 3 tests
+    recent_dangerous_defects: int  # Dangerous items in the last 3 tests
+    recent_failed_tests: int  # FAILED results in the last 3 tests
+    recent_passed_tests: int  # PASSED results in the last 3 tests
+    recent_corrosion_tests: int  # Of the last 2 tests, how many mention corrosion
+    latest_defects: List[Dict]
+    latest_major_count: int
+    latest_advisory_count: int
+    mileages: List[Any]  # Newest first, tests with both a reading and a date
+    mileage_dates: List[str]  # Completion dates matching mileages
+
 
 class ValuationEngine:
-    """Engine for calculating vehicle valuations based on MOT history"""
+    """
+    Engine for calculating vehicle valuations based on MOT history
     
-    def __init__(self):
-        # Scoring weights
-        self.WEIGHTS = {
-            "mot_history": 0.25,
-            "recent_failures": 0.30,
-            "dangerous_defects": 0.20,
-            "mileage_consistency": 0.15,
-            "age_factor": 0.10
-        }
+    Holds no per-call state, so one instance can be shared by concurrent requests
+    """
+    
+    # Scoring weights
+    WEIGHTS = {
+        "mot_history": 0.25,
+        "recent_failures": 0.30,
+        "dangerous_defects": 0.20,
+        "mileage_consistency": 0.15,
+        "age_factor": 0.10
+    }
     
     def calculate_valuation(
         self,
@@ -45,12 +88,18 @@ class ValuationEngine:
                 "message": "No MOT history available for assessment"
             }
         
+        started = time.perf_counter()
+        summary = self._summarise_tests(mot_tests)
+        if STAGE_TIMINGS:
+            summarised = time.perf_counter()
+            SUMMARISE_SECONDS.observe(summarised - started)
+        
         # Calculate individual scores
-        history_score = self._calculate_history_score(mot_tests)
-        failure_score = self._calculate_recent_failures_score(mot_tests)
-        danger_score = self._calculate_dangerous_defects_score(mot_tests)
-        mileage_score = self._calculate_mileage_score(mot_tests)
-        age_score = self._calculate_age_score(mot_tests)
+        history_score = self._calculate_history_score(summary)
+        failure_score = self._calculate_recent_failures_score(summary)
+        danger_score = self._calculate_dangerous_defects_score(summary)
+        mileage_score = self._calculate_mileage_score(summary)
+        age_score = self._calculate_age_score(summary)
         
         # Calculate weighted overall score (0-100)
         overall_score = (
@@ -61,8 +110,15 @@ class ValuationEngine:
             age_score * self.WEIGHTS["age_factor"]
         )
         
+        if STAGE_TIMINGS:
+            scored = time.perf_counter()
+            SCORE_SECONDS.observe(scored - summarised)
+        
         # Estimate repair costs
-        repair_costs = self._estimate_immediate_repairs(mot_tests)
+        repair_costs = self._estimate_immediate_repairs(summary)
+        if STAGE_TIMINGS:
+            estimated = time.perf_counter()
+            REPAIRS_SECONDS.observe(estimated - scored)
         
         # Calculate adjusted value
         total_cost = asking_price + repair_costs["total_average_cost"]
@@ -72,8 +128,14 @@ class ValuationEngine:
             overall_score,
             asking_price,
             repair_costs,
-            mot_tests
+            summary
         )
+        risk_factors = self._identify_risk_factors(summary, repair_costs)
+        positive_factors = self._identify_positive_factors(summary, overall_score)
+        finished = time.perf_counter()
+        if STAGE_TIMINGS:
+            RECOMMEND_SECONDS.observe(finished - estimated)
+        VALUATION_SECONDS.observe(finished - started)
         
         return {
             "overall_score": round(overall_score, 1),
@@ -95,38 +157,85 @@ class ValuationEngine:
                 "repair_breakdown": repair_costs["breakdown"]
             },
             "mot_summary": {
-                "total_tests": len(mot_tests),
-                "recent_failures": self._count_recent_failures(mot_tests),
+                "total_tests": summary.test_count,
+                "recent_failures": summary.recent_failed_tests,
                 "dangerous_defects_found": repair_costs["dangerous_items_count"],
                 "last_mot_date": mot_tests[0].get("completedDate", "Unknown"),
                 "last_mot_result": mot_tests[0].get("testResult", "Unknown")
             },
-            "risk_factors": self._identify_risk_factors(mot_tests, repair_costs),
-            "positive_factors": self._identify_positive_factors(mot_tests, overall_score)
+            "risk_factors": risk_factors,
+            "positive_factors": positive_factors
         }
     
-    def _calculate_history_score(self, mot_tests: List[Dict]) -> float:
+    def _summarise_tests(self, mot_tests: List[Dict]) -> VehicleSummary:
+        """Walk the tests and their defects once, collecting what every scorer needs"""
+        passes = 0
+        recent_failure_defects = 0
+        recent_dangerous_defects = 0
+        recent_failed_tests = 0
+        recent_passed_tests = 0
+        recent_corrosion_tests = 0
+        mileages = []
+        dates = []
+        
+        for index, test in enumerate(mot_tests):
+            test_result = test.get("testResult")
+            if test_result == "PASSED":
+                passes += 1
+            
+            if test.get("odometerValue") and test.get("completedDate"):
+                mileages.append(test["odometerValue"])
+                dates.append(test["completedDate"])
+            
+            if index >= 3:
+                continue
+            
+            # Recent tests
+            if test_result == "FAILED":
+                recent_failed_tests += 1
+            elif test_result == "PASSED":
+                recent_passed_tests += 1
+            
+            corrosion_found = index >= 2
+            for item in test.get("defects", []):
+                item_type = item.get("type")
+                if item_type in FAILURE_TYPES:
+                    recent_failure_defects += 1
+                if item.get("dangerous", False) or item_type == "DANGEROUS":
+                    recent_dangerous_defects += 1
+                if not corrosion_found and "corrosion" in item.get("text", "").lower():
+                    corrosion_found = True
+                    recent_corrosion_tests += 1
+        
+        latest_defects = mot_tests[0].get("defects", [])
+        
+        return VehicleSummary(
+            test_count=len(mot_tests),
+            passes=passes,
+            recent_failure_defects=recent_failure_defects,
+            recent_dangerous_defects=recent_dangerous_defects,
+            recent_failed_tests=recent_failed_tests,
+            recent_passed_tests=recent_passed_tests,
+            recent_corrosion_tests=recent_corrosion_tests,
+            latest_defects=latest_defects,
+            latest_major_count=sum(1 for d in latest_defects if d.get("type") in MAJOR_TYPES),
+            latest_advisory_count=sum(1 for d in latest_defects if d.get("type") in ADVISORY_TYPES),
+            mileages=mileages,
+            mileage_dates=dates
+        )
+    
+    def _calculate_history_score(self, summary: VehicleSummary) -> float:
         """Score based on overall MOT history (0-100)"""
-        if len(mot_tests) < 2:
+        if summary.test_count < 2:
             return 50  # Neutral for insufficient history
         
-        passes = sum(1 for test in mot_tests if test.get("testResult") == "PASSED")
-        pass_rate = (passes / len(mot_tests)) * 100
+        pass_rate = (summary.passes / summary.test_count) * 100
         
         return pass_rate
     
-    def _calculate_recent_failures_score(self, mot_tests: List[Dict]) -> float:
+    def _calculate_recent_failures_score(self, summary: VehicleSummary) -> float:
         """Score based on recent failures (0-100)"""
-        recent_tests = mot_tests[:3]  # Last 3 tests
-        
-        if not recent_tests:
-            return 50
-        
-        total_failures = 0
-        for test in recent_tests:
-            defects = test.get("defects", [])
-            failures = [item for item in defects if item.get("type") in ["FAIL", "MAJOR", "DANGEROUS"]]
-            total_failures += len(failures)
+        total_failures = summary.recent_failure_defects
         
         # Score inversely proportional to failures
         if total_failures == 0:
@@ -140,15 +249,9 @@ class ValuationEngine:
         else:
             return 20
     
-    def _calculate_dangerous_defects_score(self, mot_tests: List[Dict]) -> float:
+    def _calculate_dangerous_defects_score(self, summary: VehicleSummary) -> float:
         """Score based on dangerous defects (0-100)"""
-        dangerous_count = 0
-        
-        for test in mot_tests[:3]:  # Recent tests
-            defects = test.get("defects", [])
-            for item in defects:
-                if item.get("dangerous", False) or item.get("type") == "DANGEROUS":
-                    dangerous_count += 1
+        dangerous_count = summary.recent_dangerous_defects
         
         if dangerous_count == 0:
             return 100
@@ -159,15 +262,10 @@ class ValuationEngine:
         else:
             return 10
     
-    def _calculate_mileage_score(self, mot_tests: List[Dict]) -> float:
+    def _calculate_mileage_score(self, summary: VehicleSummary) -> float:
         """Score based on mileage consistency (0-100)"""
-        mileages = []
-        dates = []
-        
-        for test in mot_tests:
-            if test.get("odometerValue") and test.get("completedDate"):
-                mileages.append(test["odometerValue"])
-                dates.append(test["completedDate"])
+        mileages = summary.mileages
+        dates = summary.mileage_dates
         
         if len(mileages) < 2:
             return 50  # Neutral
@@ -177,7 +275,7 @@ class ValuationEngine:
             if mileages[i] < mileages[i + 1]:  # Mileage going backwards
                 return 0
         
-        # Check for reasonable annual mileage
+        # Check for reasonable annual mileage (only the two end dates are parsed)
         try:
             first_date = datetime.strptime(dates[-1], "%Y.%m.%d")
             last_date = datetime.strptime(dates[0], "%Y.%m.%d")
@@ -199,9 +297,9 @@ class ValuationEngine:
         
         return 75  # Default good score
     
-    def _calculate_age_score(self, mot_tests: List[Dict]) -> float:
+    def _calculate_age_score(self, summary: VehicleSummary) -> float:
         """Score based on vehicle age and test frequency (0-100)"""
-        test_count = len(mot_tests)
+        test_count = summary.test_count
         
         # More tests = older vehicle, but consistent testing is good
         if test_count <= 2:
@@ -213,30 +311,19 @@ class ValuationEngine:
         else:
             return 60  # Older vehicle
     
-    def _estimate_immediate_repairs(self, mot_tests: List[Dict]) -> Dict:
+    def _estimate_immediate_repairs(self, summary: VehicleSummary) -> Dict:
         """Estimate costs for immediate repairs needed"""
-        latest_test = mot_tests[0]
-        defects = latest_test.get("defects", [])
-        
         # Include failures, majors, dangerous items, and advisories for cost estimation
         immediate_issues = [
-            item for item in defects
-            if item.get("type") in ["FAIL", "MAJOR", "DANGEROUS", "ADVISORY", "MINOR"]
+            item for item in summary.latest_defects
+            if item.get("type") in REPAIR_TYPES
         ]
         
         return calculate_total_repair_costs(immediate_issues)
     
-    def _count_recent_failures(self, mot_tests: List[Dict]) -> int:
-        """Count failures in recent tests"""
-        count = 0
-        for test in mot_tests[:3]:
-            if test.get("testResult") == "FAILED":
-                count += 1
-        return count
-    
     def _identify_risk_factors(
         self,
-        mot_tests: List[Dict],
+        summary: VehicleSummary,
         repair_costs: Dict
     ) -> List[str]:
         """Identify risk factors to buyer"""
@@ -256,22 +343,17 @@ class ValuationEngine:
                 f"💰 Moderate repair costs expected (£{repair_costs['total_average_cost']:.2f})"
             )
         
-        if self._count_recent_failures(mot_tests) >= 2:
+        if summary.recent_failed_tests >= 2:
             risks.append("⚠️ Multiple recent MOT failures")
         
         # Check for specific issues
-        latest_defects = mot_tests[0].get("defects", [])
-        major_count = sum(1 for d in latest_defects if d.get("type") in ["MAJOR", "FAIL"])
+        major_count = summary.latest_major_count
         if major_count > 0:
             risks.append(f"⚠️ {major_count} major issue(s) in latest MOT")
         
-        # Check for corrosion in recent tests
-        for test in mot_tests[:2]:
-            defects = test.get("defects", [])
-            for item in defects:
-                if "corrosion" in item.get("text", "").lower():
-                    risks.append("🔧 Corrosion issues detected")
-                    break
+        # Check for corrosion in recent tests (reported once per affected test)
+        for _ in range(summary.recent_corrosion_tests):
+            risks.append("🔧 Corrosion issues detected")
         
         if not risks:
             risks.append("✅ No major risk factors identified")
@@ -280,7 +362,7 @@ class ValuationEngine:
     
     def _identify_positive_factors(
         self,
-        mot_tests: List[Dict],
+        summary: VehicleSummary,
         overall_score: float
     ) -> List[str]:
         """Identify positive factors"""
@@ -289,18 +371,14 @@ class ValuationEngine:
         if overall_score >= 80:
             positives.append("⭐ Excellent overall condition score")
         
-        recent_passes = sum(
-            1 for test in mot_tests[:3]
-            if test.get("testResult") == "PASSED"
-        )
+        recent_passes = summary.recent_passed_tests
         
         if recent_passes >= 2:
             positives.append(f"✅ {recent_passes} recent MOT passes")
         
         # Check for clean recent tests
-        latest_test = mot_tests[0]
-        defects = latest_test.get("defects", [])
-        advisory_count = sum(1 for d in defects if d.get("type") in ["ADVISORY", "MINOR"])
+        defects = summary.latest_defects
+        advisory_count = summary.latest_advisory_count
         
         if len(defects) == 0:
             positives.append("🎯 Latest MOT passed with no advisories")
@@ -317,7 +395,7 @@ class ValuationEngine:
         overall_score: float,
         asking_price: float,
         repair_costs: Dict,
-        mot_tests: List[Dict]
+        summary: VehicleSummary
     ) -> Dict[str, str]:
         """Generate purchase recommendation"""
         total_cost = asking_price + repair_costs["total_average_cost"]
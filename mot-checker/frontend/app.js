@@ -16,6 +16,9 @@ const tabBtns = document.querySelectorAll('.tab-btn');
 const preloader = document.getElementById('js-preloader');
 const backToTopBtn = document.getElementById('backToTop');
 
+// Last successful lookup, reused by the valuation so the history isn't fetched twice
+let lastLookup = null;
+
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
   initPreloader();
@@ -82,6 +85,7 @@ async function handleMotLookup(e) {
     }
     
     const data = await response.json();
+    lastLookup = data;
     displayMotResults(data);
     
   } catch (error) {
@@ -99,6 +103,11 @@ async function handleValuation(e) {
   const askingPrice = parseFloat(document.getElementById('asking-price').value);
   const submitBtn = valuationForm.querySelector('button[type="submit"]');
   
+  // Reuse the history from a lookup of the same vehicle
+  const previous = lastLookup && lastLookup.registration === registration.replace(/\s/g, '')
+    ? lastLookup
+    : null;
+  
   setLoading(submitBtn, true);
   hideResults();
   
@@ -110,7 +119,8 @@ async function handleValuation(e) {
       },
       body: JSON.stringify({ 
         registration,
-        asking_price: askingPrice
+        asking_price: askingPrice,
+        lookup_token: previous ? previous.lookup_token : undefined
       })
     });
     
@@ -120,6 +130,9 @@ async function handleValuation(e) {
     }
     
     const data = await response.json();
+    if (!data.data && previous) {
+      data.data = previous.data;
+    }
     displayValuationResults(data);
     
   } catch (error) {